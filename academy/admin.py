@@ -10,6 +10,9 @@ from .models import (
     FinalTestSubmission,
     ManagerDocument,
     CourseAssignment,
+    EffectiveCourseAssignment,
+    QuizAttempt,
+    QuestionStats,
 )
 
 # =============================
@@ -48,8 +51,11 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(Module)
 class ModuleAdmin(admin.ModelAdmin):
-    list_display = ("title", "course", "order", "min_score_to_pass", "is_mandatory")
-    list_editable = ("order", "min_score_to_pass", "is_mandatory")
+    list_display = (
+        "title", "course", "order", "min_score_to_pass", "is_mandatory",
+        "questions_per_attempt", "shuffle_choices",
+    )
+    list_editable = ("order", "min_score_to_pass", "is_mandatory", "questions_per_attempt", "shuffle_choices")
     list_filter = ("course", "is_mandatory")
     search_fields = ("title", "description")
     ordering = ("course__order", "order")
@@ -156,3 +162,36 @@ class CourseAssignmentAdmin(admin.ModelAdmin):
     list_filter = ("course", "group")
     search_fields = ("user__username", "group__name", "course__title")
     ordering = ("-assigned_at",)
+
+
+@admin.register(EffectiveCourseAssignment)
+class EffectiveCourseAssignmentAdmin(admin.ModelAdmin):
+    list_display = ("user", "course", "source", "group")
+    list_filter = ("source", "course", "group")
+    search_fields = ("user__username", "course__title", "group__name")
+
+    def has_add_permission(self, request):
+        # Maintained from CourseAssignment; edit those instead
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =============================
+# QUIZ ATTEMPTS & QUESTION STATS
+# =============================
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ("user", "module", "kind", "score_percent", "submitted_at")
+    list_filter = ("kind", "module__course")
+    search_fields = ("user__username", "module__title")
+    ordering = ("-submitted_at",)
+
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    list_display = ("question", "attempts", "correct", "unanswered", "percent_correct")
+    search_fields = ("question__text",)
+    readonly_fields = ("attempts", "correct", "unanswered")
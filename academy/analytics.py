@@ -0,0 +1,123 @@
+# academy/analytics.py
+"""
+Quiz attempt history and incremental per-question statistics.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Choice, ChoiceStats, Question, QuestionStats, QuizAttempt
+
+
+def record_attempt(user, module, kind, results):
+    """
+    Store a QuizAttempt and bump QuestionStats / ChoiceStats counters.
+
+    'results' is a list of {"question_id", "selected_choice_id", "is_correct"}
+    (the shape returned by grading.grade_submission and stored by final_test).
+    Counters are updated with a fixed number of UPDATE ... SET x = x + 1
+    statements, whatever the number of questions.
+    """
+    question_ids = [r["question_id"] for r in results]
+    correct_ids = [r["question_id"] for r in results if r["is_correct"]]
+    unanswered_ids = [r["question_id"] for r in results if r["selected_choice_id"] is None]
+    picked_ids = [r["selected_choice_id"] for r in results if r["selected_choice_id"] is not None]
+
+    total = len(results)
+    correct = len(correct_ids)
+
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            user=user,
+            module=module,
+            kind=kind,
+            answers={str(r["question_id"]): r["selected_choice_id"] for r in results},
+            correct_count=correct,
+            total_questions=total,
+            score_percent=int((correct / total) * 100) if total else 0,
+        )
+
+        if question_ids:
+            QuestionStats.objects.bulk_create(
+                [QuestionStats(question_id=pk) for pk in question_ids],
+                ignore_conflicts=True,
+            )
+            QuestionStats.objects.filter(question_id__in=question_ids).update(
+                attempts=F("attempts") + 1
+            )
+        if correct_ids:
+            QuestionStats.objects.filter(question_id__in=correct_ids).update(
+                correct=F("correct") + 1
+            )
+        if unanswered_ids:
+            QuestionStats.objects.filter(question_id__in=unanswered_ids).update(
+                unanswered=F("unanswered") + 1
+            )
+        if picked_ids:
+            ChoiceStats.objects.bulk_create(
+                [ChoiceStats(choice_id=pk) for pk in picked_ids],
+                ignore_conflicts=True,
+            )
+            ChoiceStats.objects.filter(choice_id__in=picked_ids).update(
+                picks=F("picks") + 1
+            )
+
+    return attempt
+
+
+def question_stats_rows(module=None):
+    """
+    Item-analysis rows for the manager page, built from the stats tables in
+    two queries (questions + choices), optionally limited to one module:
+
+        {"question", "attempts", "percent_correct", "unanswered",
+         "choices": [{"choice", "picks", "percent"}], "top_distractor"}
+
+    Questions nobody has attempted yet are included with zero counts.
+    """
+    questions = (
+        Question.objects
+        .select_related("module__course", "stats")
+        .order_by("module__course__title", "module__order", "order", "pk")
+    )
+    choices = Choice.objects.select_related("stats").order_by("pk")
+    if module is not None:
+        questions = questions.filter(module=module)
+        choices = choices.filter(question__module=module)
+
+    choices_by_question = {}
+    for choice in choices:
+        choices_by_question.setdefault(choice.question_id, []).append(choice)
+
+    rows = []
+    for question in questions:
+        stats = getattr(question, "stats", None)
+        attempts = stats.attempts if stats else 0
+
+        choice_rows = []
+        top_distractor = None
+        for choice in choices_by_question.get(question.pk, []):
+            choice_stats = getattr(choice, "stats", None)
+            picks = choice_stats.picks if choice_stats else 0
+            row = {
+                "choice": choice,
+                "picks": picks,
+                "percent": int((picks / attempts) * 100) if attempts else 0,
+            }
+            choice_rows.append(row)
+            if not choice.is_correct and picks and (
+                top_distractor is None or picks > top_distractor["picks"]
+            ):
+                top_distractor = row
+
+        rows.append({
+            "question": question,
+            "attempts": attempts,
+            "percent_correct": stats.percent_correct if stats else None,
+            "unanswered": stats.unanswered if stats else 0,
+            "choices": choice_rows,
+            "top_distractor": top_distractor,
+        })
+
+    # Hardest questions first; unattempted ones last
+    rows.sort(key=lambda r: (r["percent_correct"] is None, r["percent_correct"] or 0))
+    return rows
@@ -0,0 +1,125 @@
+# academy/assignments.py
+"""
+Maintenance of EffectiveCourseAssignment, the materialised union of direct
+and group course assignments.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import CourseAssignment, EffectiveCourseAssignment
+
+REBUILD_BATCH_SIZE = 500
+
+
+def _desired_rows(user_ids=None, course_ids=None):
+    """
+    {(user_id, course_id, group_id or None)} implied by CourseAssignment
+    (two queries: direct rows and group rows joined to memberships).
+    """
+    direct = {"user__isnull": False}
+    # Keep the membership conditions in one filter() so they share one join
+    via_group = {"group__isnull": False, "group__user__isnull": False}
+    if user_ids is not None:
+        direct["user_id__in"] = user_ids
+        via_group["group__user__in"] = user_ids
+    if course_ids is not None:
+        direct["course_id__in"] = course_ids
+        via_group["course_id__in"] = course_ids
+    direct = CourseAssignment.objects.filter(**direct)
+    via_group = CourseAssignment.objects.filter(**via_group)
+
+    rows = {(user_id, course_id, None) for user_id, course_id in direct.values_list("user_id", "course_id")}
+    rows.update(via_group.values_list("group__user", "course_id", "group_id"))
+    return rows
+
+
+def refresh_effective_assignments(user_ids=None, course_ids=None):
+    """
+    Bring EffectiveCourseAssignment in line with CourseAssignment for the
+    given users and/or courses (None = all). Returns (created, deleted).
+    """
+    if user_ids is not None:
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return 0, 0
+    if course_ids is not None:
+        course_ids = list(set(course_ids))
+        if not course_ids:
+            return 0, 0
+
+    existing = EffectiveCourseAssignment.objects.all()
+    if user_ids is not None:
+        existing = existing.filter(user_id__in=user_ids)
+    if course_ids is not None:
+        existing = existing.filter(course_id__in=course_ids)
+
+    with transaction.atomic():
+        desired = _desired_rows(user_ids, course_ids)
+        current = {
+            (user_id, course_id, group_id): pk
+            for pk, user_id, course_id, group_id in existing.values_list("pk", "user_id", "course_id", "group_id")
+        }
+
+        stale = [pk for key, pk in current.items() if key not in desired]
+        if stale:
+            EffectiveCourseAssignment.objects.filter(pk__in=stale).delete()
+
+        missing = [
+            EffectiveCourseAssignment(
+                user_id=user_id,
+                course_id=course_id,
+                group_id=group_id,
+                source=(
+                    EffectiveCourseAssignment.SOURCE_GROUP if group_id
+                    else EffectiveCourseAssignment.SOURCE_DIRECT
+                ),
+            )
+            for user_id, course_id, group_id in desired
+            if (user_id, course_id, group_id) not in current
+        ]
+        EffectiveCourseAssignment.objects.bulk_create(missing, ignore_conflicts=True)
+
+    return len(missing), len(stale)
+
+
+def group_member_ids(group_id):
+    """
+    Members of a group plus anyone still holding rows from it.
+    """
+    User = get_user_model()
+    member_ids = set(User.objects.filter(groups=group_id).values_list("pk", flat=True))
+    member_ids.update(
+        EffectiveCourseAssignment.objects.filter(group_id=group_id).values_list("user_id", flat=True)
+    )
+    return member_ids
+
+
+def refresh_for_assignment(user_id=None, group_id=None, course_id=None):
+    """
+    A CourseAssignment was added, changed or removed.
+    """
+    user_ids = set()
+    if user_id:
+        user_ids.add(user_id)
+    if group_id:
+        user_ids |= group_member_ids(group_id)
+    return refresh_effective_assignments(user_ids, [course_id] if course_id else None)
+
+
+def rebuild_effective_assignments(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute every user's rows in batches. Returns (created, deleted).
+    """
+    User = get_user_model()
+    created = deleted = 0
+    batch = []
+    for user_id in User.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            c, d = refresh_effective_assignments(batch)
+            created, deleted = created + c, deleted + d
+            batch = []
+    if batch:
+        c, d = refresh_effective_assignments(batch)
+        created, deleted = created + c, deleted + d
+    return created, deleted
@@ -0,0 +1,245 @@
+# academy/catalogue.py
+"""
+Course catalogue for the driver app (read-only JSON API).
+
+A course tree (modules, lessons, question counts) is built in a fixed number
+of queries and cached per course content version. A user's progress in the
+course has its own version per user + course. Both versions make up the
+ETag and live in the shared Redis cache (see CACHES in cozys/settings.py),
+so every worker agrees on them and a conditional request for an unchanged
+course is answered with 304 from three cache reads (slug, content version,
+progress version): no queries beyond the session and user lookups.
+
+A version is the time of the last change in microseconds, written fresh on
+every bump, so a version lost from the cache comes back as a new value,
+never as one already handed out in an ETag.
+
+Content versions are bumped from academy/signals.py (course, module, lesson,
+question changes) and progress versions from ModuleProgress/LessonProgress
+changes.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.urls import reverse
+
+from .models import Course, EffectiveCourseAssignment, Lesson, LessonProgress, Module, ModuleProgress
+from .progress import build_module_unlock_map
+
+CATALOGUE_API_VERSION = 1
+CATALOGUE_TIMEOUT = 60 * 60 * 24
+
+
+def _new_version():
+    # Still a safe integer for JavaScript clients
+    return time.time_ns() // 1000
+
+
+def _version(key):
+    return cache.get_or_set(key, _new_version, None)
+
+
+def _bump(key):
+    cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), None))
+
+
+def _content_version_key(course_id):
+    return f"academy:catalogue_v:{course_id}"
+
+
+def _progress_version_key(course_id, user_id):
+    return f"academy:catalogue_progress_v:{course_id}:{user_id}"
+
+
+def _slug_key(slug):
+    return f"academy:catalogue_slug:{slug}"
+
+
+def invalidate_course_catalogue(*course_ids):
+    """
+    Course content changed (course, modules, lessons or questions).
+    """
+    for course_id in {c for c in course_ids if c}:
+        _bump(_content_version_key(course_id))
+
+
+def invalidate_module_catalogue(*module_ids):
+    """
+    Same, for callers that only know module ids (lesson and question changes).
+    """
+    module_ids = {m for m in module_ids if m}
+    if module_ids:
+        invalidate_course_catalogue(
+            *Module.objects.filter(pk__in=module_ids).values_list("course_id", flat=True)
+        )
+
+
+def invalidate_course_slug(*slugs):
+    keys = [_slug_key(slug) for slug in slugs if slug]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_progress_catalogue(user_id, course_id):
+    _bump(_progress_version_key(course_id, user_id))
+
+
+def catalogue_course_id(slug):
+    """
+    Active course id for a slug (0 cached for unknown or inactive courses).
+    """
+    key = _slug_key(slug)
+    course_id = cache.get(key)
+    if course_id is None:
+        course_id = (
+            Course.objects.filter(slug=slug, is_active=True).values_list("pk", flat=True).first() or 0
+        )
+        cache.set(key, course_id, CATALOGUE_TIMEOUT)
+    return course_id or None
+
+
+def course_content_version(course_id):
+    return _version(_content_version_key(course_id))
+
+
+def catalogue_etag(course_id, user_id):
+    raw = (
+        f"{CATALOGUE_API_VERSION}:{course_id}:{course_content_version(course_id)}:"
+        f"{_version(_progress_version_key(course_id, user_id))}"
+    )
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def catalogue_index(user):
+    """
+    The user's assigned active courses with their content versions, so the
+    app can poll one small list and only re-fetch courses that changed.
+    """
+    courses = (
+        Course.objects
+        .filter(
+            pk__in=EffectiveCourseAssignment.objects.filter(user=user).values("course_id"),
+            is_active=True,
+        )
+        .order_by("order", "title")
+        .values_list("pk", "slug", "title")
+    )
+    return [
+        {
+            "id": pk,
+            "slug": slug,
+            "title": title,
+            "version": course_content_version(pk),
+            "url": reverse("academy_api_course", args=[slug]),
+        }
+        for pk, slug, title in courses
+    ]
+
+
+def catalogue_index_etag(courses):
+    raw = f"{CATALOGUE_API_VERSION}:" + ",".join(f"{c['id']}:{c['version']}" for c in courses)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def course_tree(course_id):
+    """
+    The course with its modules and lessons, cached per content version.
+    Three queries on a miss: course, modules (with question counts), lessons.
+    """
+    version = course_content_version(course_id)
+    key = f"academy:catalogue:{course_id}:{version}"
+    tree = cache.get(key)
+    if tree is not None:
+        return tree
+
+    course = (
+        Course.objects
+        .prefetch_related(
+            Prefetch(
+                "modules",
+                queryset=Module.objects.annotate(question_count=Count("questions")).order_by("order", "pk"),
+            ),
+            # Only the pre-rendered HTML is served, not the lesson source
+            Prefetch("modules__lessons", queryset=Lesson.objects.defer("content"), to_attr="lesson_list"),
+        )
+        .get(pk=course_id)
+    )
+    tree = {
+        "id": course.pk,
+        "slug": course.slug,
+        "title": course.title,
+        "description": course.description,
+        "order": course.order,
+        "version": version,
+        "url": reverse("academy_course_detail", args=[course.slug]),
+        "modules": [
+            {
+                "id": module.pk,
+                "slug": module.slug,
+                "title": module.title,
+                "description": module.description,
+                "order": module.order,
+                "is_mandatory": module.is_mandatory,
+                "min_score_to_pass": module.min_score_to_pass,
+                "questions_per_attempt": module.questions_per_attempt,
+                "question_count": module.question_count,
+                "url": reverse("academy_module_detail", args=[course.slug, module.slug]),
+                "lessons": [
+                    {
+                        "id": lesson.pk,
+                        "title": lesson.title,
+                        "order": lesson.order,
+                        "video_url": lesson.video_url,
+                        "image_url": lesson.image_url,
+                        "html": lesson.rendered_html,
+                        "hash": lesson.content_hash,
+                        "url": reverse("academy_lesson_detail", args=[course.slug, module.slug, lesson.pk]),
+                    }
+                    for lesson in module.lesson_list
+                ],
+            }
+            for module in course.modules.all()
+        ],
+    }
+    cache.set(key, tree, CATALOGUE_TIMEOUT)
+    return tree
+
+
+def user_course_progress(user, course_id):
+    """
+    The user's progress per module: status, score, unlocked, completed lessons.
+    """
+    completed = {}
+    for module_id, lesson_id in (
+        LessonProgress.objects
+        .filter(user=user, lesson__module__course_id=course_id, completed=True)
+        .values_list("lesson__module_id", "lesson_id")
+    ):
+        completed.setdefault(module_id, []).append(lesson_id)
+
+    rows = {
+        module_id: (status, score, completed_at)
+        for module_id, status, score, completed_at in (
+            ModuleProgress.objects
+            .filter(user=user, module__course_id=course_id)
+            .values_list("module_id", "status", "score", "completed_at")
+        )
+    }
+
+    unlock_map = build_module_unlock_map(user, Course(pk=course_id))
+    progress = []
+    for module_id, unlocked in unlock_map.items():
+        status, score, completed_at = rows.get(module_id, ("not_started", 0, None))
+        progress.append({
+            "module": module_id,
+            "status": status,
+            "score": score,
+            "completed_at": completed_at,
+            "unlocked": unlocked,
+            "completed_lessons": sorted(completed.get(module_id, [])),
+        })
+    return progress
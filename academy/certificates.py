@@ -0,0 +1,409 @@
+# academy/certificates.py
+"""
+Certificate PDF rendering.
+
+The logo is decoded and shrunk once per process; that is the only part of
+the artwork reused between documents. The static artwork (border, logo,
+headings, footer) is still drawn into each PDF, as a form XObject shared by
+that document's pages, and the per-certificate fields are drawn on top.
+Finished PDFs are cached by certificate id + a hash of their content, so
+repeat downloads skip ReportLab entirely and any change to the printed
+fields produces a new file.
+
+Each certificate can also carry a QR code pointing at its public
+verification page, which is served from a small cached record.
+"""
+import hashlib
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import django
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .exports import ZipStream
+from .models import Certificate
+
+# Bump when the certificate design changes so cached PDFs are not reused
+CERTIFICATE_TEMPLATE_VERSION = 1
+CERTIFICATE_PDF_TIMEOUT = 60 * 60 * 24 * 30
+
+LOGO_PATH = os.path.join(settings.BASE_DIR, "static", "media", "LOGO-Cozys.webp")
+LOGO_BOX = (180, 80)   # points
+LOGO_DPI_SCALE = 3     # pixels per point kept after downscaling
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 50
+BURGUNDY = colors.HexColor("#800020")
+GRAY = colors.HexColor("#444444")
+
+BACKGROUND_FORM = "certificate_background"
+QR_SIZE = 70   # points
+
+# Public verification records. Not-found answers are cached briefly so that
+# guessing numbers cannot keep the database busy.
+VERIFICATION_TIMEOUT = 60 * 60 * 24
+VERIFICATION_MISS_TIMEOUT = 60 * 5
+_CERTIFICATE_NUMBER_MAX = Certificate._meta.get_field("certificate_number").max_length
+
+
+@lru_cache(maxsize=1)
+def _logo():
+    """
+    The logo decoded and shrunk to print size once per process, instead of
+    decoding the full-size file for every certificate. None if unavailable.
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(LOGO_PATH) as image:
+            image = image.convert("RGBA")
+            image.thumbnail((LOGO_BOX[0] * LOGO_DPI_SCALE, LOGO_BOX[1] * LOGO_DPI_SCALE))
+            image.load()
+        return ImageReader(image)
+    except (OSError, ImportError):
+        return None
+
+
+def _logo_stamp():
+    try:
+        return int(os.path.getmtime(LOGO_PATH))
+    except OSError:
+        return 0
+
+
+def _draw_background(p):
+    """
+    Static parts of the certificate as a form XObject. Drawn into every
+    document (a certificate is usually a document of its own); only the
+    decoded logo comes from the per-process cache.
+    """
+    page_width, page_height = PAGE_SIZE
+
+    p.beginForm(BACKGROUND_FORM)
+
+    # Border
+    p.setStrokeColor(BURGUNDY)
+    p.setLineWidth(4)
+    p.rect(MARGIN / 2, MARGIN / 2, page_width - MARGIN, page_height - MARGIN, stroke=1, fill=0)
+
+    # Logo (top-left)
+    logo = _logo()
+    if logo is not None:
+        p.drawImage(
+            logo,
+            x=MARGIN,
+            y=page_height - 130,
+            width=LOGO_BOX[0],
+            height=LOGO_BOX[1],
+            mask="auto",
+            preserveAspectRatio=True,
+        )
+
+    # Title
+    p.setFont("Helvetica-Bold", 32)
+    p.setFillColor(BURGUNDY)
+    p.drawCentredString(page_width / 2, page_height - 200, "Certificate of Completion")
+
+    # Subtitle line
+    p.setStrokeColor(GRAY)
+    p.setLineWidth(1)
+    p.line(page_width / 4, page_height - 210, page_width * 3 / 4, page_height - 210)
+
+    p.setFillColor(GRAY)
+    p.setFont("Helvetica", 16)
+    p.drawCentredString(page_width / 2, page_height - 270, "This certifies that")
+
+    p.setFont("Helvetica", 15)
+    p.drawCentredString(page_width / 2, page_height - 335, "has successfully completed")
+
+    # Footer
+    p.setFont("Helvetica", 10)
+    p.setFillColor(BURGUNDY)
+    p.drawCentredString(page_width / 2, MARGIN + 35, "Cozy Travel – Driver Academy")
+    p.setFillColor(GRAY)
+    p.drawCentredString(page_width / 2, MARGIN + 20, "© Cozy Travel Ltd. All rights reserved")
+
+    p.endForm()
+
+
+def verification_url(certificate_number):
+    """
+    Absolute URL of the public verification page, for printing on the PDF.
+    Uses ACADEMY_VERIFY_BASE_URL, falling back to the current Site's domain.
+    """
+    base = getattr(settings, "ACADEMY_VERIFY_BASE_URL", "") or f"https://{Site.objects.get_current().domain}"
+    return base.rstrip("/") + reverse("academy_verify_certificate", args=[certificate_number])
+
+
+def certificate_fields(certificate):
+    """
+    Everything printed that varies per certificate.
+    """
+    user = certificate.user
+    return {
+        "name": user.get_full_name() or user.username,
+        "course": certificate.course.title,
+        "module": certificate.module.title,
+        "score": certificate.score,
+        "issued": certificate.issued_at.strftime("%d %B %Y"),
+        "number": certificate.certificate_number,
+        "verify_url": (
+            verification_url(certificate.certificate_number)
+            if getattr(settings, "ACADEMY_CERTIFICATE_QR", True) else None
+        ),
+    }
+
+
+def certificate_content_hash(fields):
+    payload = json.dumps(
+        {"fields": fields, "v": CERTIFICATE_TEMPLATE_VERSION, "logo": _logo_stamp()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _draw_fields(p, fields):
+    page_width, page_height = PAGE_SIZE
+
+    p.setFont("Helvetica-Bold", 26)
+    p.setFillColor(BURGUNDY)
+    p.drawCentredString(page_width / 2, page_height - 305, fields["name"])
+
+    p.setFont("Helvetica-Bold", 20)
+    p.drawCentredString(page_width / 2, page_height - 370, fields["course"])
+
+    p.setFont("Helvetica", 13)
+    p.setFillColor(GRAY)
+    p.drawCentredString(page_width / 2, page_height - 395, f"Module: {fields['module']}")
+    p.drawCentredString(page_width / 2, page_height - 415, f"Score Achieved: {fields['score']}%")
+
+    p.setFont("Helvetica-Oblique", 11)
+    p.drawCentredString(page_width / 2, MARGIN + 80, f"Issued on {fields['issued']}")
+    p.drawCentredString(page_width / 2, MARGIN + 60, f"Certificate No: {fields['number']}")
+
+    if fields.get("verify_url"):
+        _draw_qr(p, fields["verify_url"])
+
+
+def _draw_qr(p, url):
+    page_width, _ = PAGE_SIZE
+    widget = QrCodeWidget(url, barBorder=0)
+    x0, y0, x1, y1 = widget.getBounds()
+    drawing = Drawing(QR_SIZE, QR_SIZE, transform=[QR_SIZE / (x1 - x0), 0, 0, QR_SIZE / (y1 - y0), 0, 0])
+    drawing.add(widget)
+
+    x = page_width - MARGIN - QR_SIZE
+    y = MARGIN + 20
+    renderPDF.draw(drawing, p, x, y)
+    p.setFont("Helvetica", 7)
+    p.setFillColor(GRAY)
+    p.drawCentredString(x + QR_SIZE / 2, y - 10, "Scan to verify")
+
+
+def render_certificate_pdf(fields_list):
+    """
+    Render one page per certificate fields dict into a single PDF (bytes).
+    The background form is stored once per document and referenced from
+    each of its pages.
+    """
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    p.setTitle("Cozy Academy Certificate")
+    _draw_background(p)
+
+    for fields in fields_list:
+        p.doForm(BACKGROUND_FORM)
+        _draw_fields(p, fields)
+        p.showPage()
+
+    p.save()
+    return buffer.getvalue()
+
+
+def get_certificate_pdf(certificate):
+    """
+    Return (pdf_bytes, content_hash), served from cache when the printed
+    content is unchanged.
+    """
+    fields = certificate_fields(certificate)
+    content_hash = certificate_content_hash(fields)
+    key = f"academy:certificate_pdf:{certificate.pk}:{content_hash}"
+
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_certificate_pdf([fields])
+        cache.set(key, pdf, CERTIFICATE_PDF_TIMEOUT)
+    return pdf, content_hash
+
+
+# ---------------------------------------------------------------------------
+# Batch export
+# ---------------------------------------------------------------------------
+# Certificates not already in the PDF cache are rendered in a process pool;
+# the parent collects the results, stores them in the cache and hands them
+# on (e.g. into a streamed ZIP) as they complete.
+
+BATCH_POOL_THRESHOLD = 8   # below this, rendering in-process is faster than starting a pool
+
+
+def certificate_batch(course=None, date_from=None, date_to=None):
+    certificates = (
+        Certificate.objects
+        .select_related("user", "course", "module")
+        .order_by("issued_at", "pk")
+    )
+    if course is not None:
+        certificates = certificates.filter(course=course)
+    if date_from is not None:
+        certificates = certificates.filter(issued_at__date__gte=date_from)
+    if date_to is not None:
+        certificates = certificates.filter(issued_at__date__lte=date_to)
+    return certificates
+
+
+def certificate_filename(fields):
+    return get_valid_filename(f"{fields['number']}.pdf")
+
+
+def _render_job(job):
+    """
+    Worker entry point (must stay a module-level function to be picklable).
+    """
+    key, fields = job
+    return key, render_certificate_pdf([fields])
+
+
+def iter_certificate_pdfs(certificates, workers=None, progress=None):
+    """
+    Yield (filename, pdf_bytes) for each certificate, cached ones first and
+    the rest as the pool finishes them. 'progress(done, total)' is called
+    after each certificate.
+    """
+    jobs = {}
+    for certificate in certificates.iterator(chunk_size=500):
+        fields = certificate_fields(certificate)
+        key = f"academy:certificate_pdf:{certificate.pk}:{certificate_content_hash(fields)}"
+        jobs[key] = fields
+
+    total = len(jobs)
+    done = 0
+
+    cached = cache.get_many(list(jobs))
+    for key, pdf in cached.items():
+        done += 1
+        if progress:
+            progress(done, total)
+        yield certificate_filename(jobs.pop(key)), pdf
+
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+
+    if workers <= 1 or len(jobs) < BATCH_POOL_THRESHOLD:
+        results = map(_render_job, jobs.items())
+        executor = None
+    else:
+        # Workers may be spawned rather than forked, so set Django up in each
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        futures = [executor.submit(_render_job, job) for job in jobs.items()]
+        results = (future.result() for future in as_completed(futures))
+
+    try:
+        for key, pdf in results:
+            cache.set(key, pdf, CERTIFICATE_PDF_TIMEOUT)
+            done += 1
+            if progress:
+                progress(done, total)
+            yield certificate_filename(jobs[key]), pdf
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def stream_certificates_zip(certificates, workers=None, progress=None):
+    """
+    Yield a ZIP archive of certificate PDFs chunk by chunk. PDFs are already
+    compressed, so entries are stored rather than deflated.
+    """
+    sink = ZipStream()
+    seen = set()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for filename, pdf in iter_certificate_pdfs(certificates, workers, progress):
+            # Certificate numbers are unique, but guard against sanitised clashes
+            name, n = filename, 1
+            while name in seen:
+                n += 1
+                name = f"{filename[:-4]}-{n}.pdf"
+            seen.add(name)
+            zf.writestr(name, pdf)
+            yield sink.drain()
+    yield sink.drain()
+
+
+# ---------------------------------------------------------------------------
+# Public verification
+# ---------------------------------------------------------------------------
+
+def _verification_key(certificate_number):
+    digest = hashlib.sha256(certificate_number.encode("utf-8")).hexdigest()[:32]
+    return f"academy:certificate_verify:{digest}"
+
+
+def invalidate_certificate_verification(*certificate_numbers):
+    keys = [_verification_key(n) for n in certificate_numbers if n]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def verification_record(certificate_number):
+    """
+    The minimal public facts about a certificate, or None if no certificate
+    has this number. One indexed read on a cache miss, none on a hit.
+    """
+    if not certificate_number or len(certificate_number) > _CERTIFICATE_NUMBER_MAX:
+        return None
+
+    key = _verification_key(certificate_number)
+    record = cache.get(key)
+    if record is None:
+        row = (
+            Certificate.objects
+            .filter(certificate_number=certificate_number)
+            .values_list(
+                "user__first_name", "user__last_name", "user__username",
+                "course__title", "module__title", "issued_at",
+            )
+            .first()
+        )
+        if row is None:
+            # Cache the miss as an empty dict; None means "not cached"
+            cache.set(key, {}, VERIFICATION_MISS_TIMEOUT)
+            return None
+        first_name, last_name, username, course_title, module_title, issued_at = row
+        record = {
+            "certificate_number": certificate_number,
+            "holder": f"{first_name} {last_name}".strip() or username,
+            "course": course_title,
+            "module": module_title,
+            "issued_on": issued_at.date().isoformat(),
+        }
+        record["etag"] = hashlib.sha256(
+            json.dumps(record, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:32]
+        cache.set(key, record, VERIFICATION_TIMEOUT)
+    return record or None
@@ -0,0 +1,142 @@
+# academy/compliance.py
+"""
+Group compliance: the share of a group's drivers who have passed every
+mandatory module of a course. Figures come from conditional aggregates in
+SQL and are cached per group + course.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import CourseAssignment, Module
+
+COMPLIANCE_TIMEOUT = 60 * 60
+
+
+def _new_version():
+    return time.time_ns() // 1000
+
+
+def _version(key):
+    return cache.get_or_set(key, _new_version, None)
+
+
+def _bump(key):
+    cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), None))
+
+
+def _course_version_key(course_id):
+    return f"academy:compliance_course_v:{course_id}"
+
+
+def _group_version_key(group_id):
+    return f"academy:compliance_group_v:{group_id}"
+
+
+def invalidate_course_compliance(*course_ids):
+    """
+    Progress, modules or assignments changed for these courses.
+    """
+    for course_id in {c for c in course_ids if c}:
+        _bump(_course_version_key(course_id))
+
+
+def invalidate_group_compliance(*group_ids):
+    """
+    Group membership changed.
+    """
+    for group_id in {g for g in group_ids if g}:
+        _bump(_group_version_key(group_id))
+
+
+def _drivers(group, course):
+    """
+    Active members of 'group' who have 'course' assigned (directly or via any group).
+    """
+    return get_user_model().objects.filter(
+        is_active=True,
+        groups=group,
+        effective_course_assignments__course=course,
+    )
+
+
+def _passed_mandatory(course):
+    return Count(
+        "moduleprogress",
+        filter=Q(
+            moduleprogress__module__course=course,
+            moduleprogress__module__is_mandatory=True,
+            moduleprogress__score__gte=F("moduleprogress__module__min_score_to_pass"),
+        ),
+        distinct=True,
+    )
+
+
+def compliance_summary(group, course):
+    """
+    {"drivers", "compliant", "percent", "mandatory_modules"} for one group
+    and course: one aggregate query (plus a module count) on a cache miss.
+    """
+    key = (
+        f"academy:compliance:{group.pk}:{course.pk}:"
+        f"{_version(_course_version_key(course.pk))}:{_version(_group_version_key(group.pk))}"
+    )
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    mandatory = Module.objects.filter(course=course, is_mandatory=True).count()
+    totals = (
+        _drivers(group, course)
+        .annotate(passed=_passed_mandatory(course))
+        .aggregate(
+            drivers=Count("pk"),
+            compliant=Count("pk", filter=Q(passed__gte=mandatory)),
+        )
+    )
+    drivers = totals["drivers"] or 0
+    compliant = totals["compliant"] or 0
+    summary = {
+        "drivers": drivers,
+        "compliant": compliant,
+        "percent": int((compliant / drivers) * 100) if drivers else None,
+        "mandatory_modules": mandatory,
+    }
+    cache.set(key, summary, COMPLIANCE_TIMEOUT)
+    return summary
+
+
+def non_compliant_drivers(group, course):
+    """
+    Drivers in the group still missing mandatory passes, with their count.
+    """
+    mandatory = Module.objects.filter(course=course, is_mandatory=True).count()
+    return (
+        _drivers(group, course)
+        .annotate(passed=_passed_mandatory(course))
+        .filter(passed__lt=mandatory)
+        .order_by("username")
+    ), mandatory
+
+
+def group_course_pairs():
+    """
+    Every (group, course) pair that has a group CourseAssignment.
+    """
+    seen = set()
+    pairs = []
+    for assignment in (
+        CourseAssignment.objects
+        .filter(group__isnull=False, course__is_active=True)
+        .select_related("group", "course")
+        .order_by("group__name", "course__order", "course__title")
+    ):
+        key = (assignment.group_id, assignment.course_id)
+        if key not in seen:
+            seen.add(key)
+            pairs.append((assignment.group, assignment.course))
+    return pairs
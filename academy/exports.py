@@ -0,0 +1,221 @@
+# academy/exports.py
+"""
+Streaming exports of training records (ModuleProgress / Certificate rows).
+
+Rows come straight from .iterator() and are written out as they are read,
+so memory use stays flat however many records are exported. XLSX files are
+produced with the standard library (zipfile + inline-string worksheet XML),
+so no spreadsheet package is needed.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from .models import Certificate, ModuleProgress
+
+EXPORT_CHUNK_SIZE = 2000
+
+PROGRESS_HEADER = (
+    "Username", "Name", "Email", "Course", "Module",
+    "Status", "Score %", "Completed at", "Last attempt at",
+)
+CERTIFICATE_HEADER = (
+    "Username", "Name", "Email", "Course", "Module",
+    "Certificate number", "Score %", "Issued at",
+)
+
+
+# ---------------------------------------------------------------------------
+# Row sources
+# ---------------------------------------------------------------------------
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def _iso(value):
+    return value.isoformat(timespec="seconds") if value else ""
+
+
+def _scoped(queryset, course=None, group=None):
+    if course is not None:
+        queryset = queryset.filter(module__course=course)
+    if group is not None:
+        queryset = queryset.filter(user__groups=group)
+    return queryset
+
+
+def progress_rows(course=None, group=None):
+    """
+    One tuple per ModuleProgress row, optionally limited to a course or a
+    user group (auth Group).
+    """
+    rows = (
+        _scoped(ModuleProgress.objects.all(), course, group)
+        .order_by("user__username", "module__course__order", "module__order")
+        .values_list(
+            "user__username", "user__first_name", "user__last_name", "user__email",
+            "module__course__title", "module__title",
+            "status", "score", "completed_at", "last_attempt_at",
+        )
+    )
+    for (username, first, last, email, course_title, module_title,
+         status, score, completed_at, last_attempt_at) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (
+            username, _full_name(first, last), email, course_title, module_title,
+            status, score, _iso(completed_at), _iso(last_attempt_at),
+        )
+
+
+def certificate_rows(course=None, group=None):
+    """
+    One tuple per issued Certificate, optionally limited to a course or group.
+    """
+    rows = _scoped(Certificate.objects.all(), None, group)
+    if course is not None:
+        rows = rows.filter(course=course)
+    rows = (
+        rows
+        .order_by("user__username", "issued_at")
+        .values_list(
+            "user__username", "user__first_name", "user__last_name", "user__email",
+            "course__title", "module__title",
+            "certificate_number", "score", "issued_at",
+        )
+    )
+    for (username, first, last, email, course_title, module_title,
+         number, score, issued_at) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (
+            username, _full_name(first, last), email, course_title, module_title,
+            number, score, _iso(issued_at),
+        )
+
+
+EXPORT_KINDS = {
+    "progress": (PROGRESS_HEADER, progress_rows),
+    "certificates": (CERTIFICATE_HEADER, certificate_rows),
+}
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+class _Echo:
+    """
+    File-like object that hands back whatever is written to it.
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class ZipStream:
+    """
+    Unseekable sink for zipfile; collected bytes are drained by the generator.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_TAIL = "</sheetData></worksheet>"
+
+# Control characters are not allowed in XML 1.0
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool) or value is None:
+        value = "" if value is None else str(value)
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_INVALID.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def stream_xlsx(header, rows, sheet_name="Export", flush_every=500):
+    """
+    Yield an .xlsx file in chunks. Only the current batch of rows is held in
+    memory; the zip is written to an unseekable stream (data descriptors).
+    """
+    sink = ZipStream()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        yield sink.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_XLSX_SHEET_HEAD + _xlsx_row(header)).encode("utf-8"))
+            batch = []
+            for row in rows:
+                batch.append(_xlsx_row(row))
+                if len(batch) >= flush_every:
+                    sheet.write("".join(batch).encode("utf-8"))
+                    batch = []
+                    yield sink.drain()
+            sheet.write(("".join(batch) + _XLSX_SHEET_TAIL).encode("utf-8"))
+
+    yield sink.drain()
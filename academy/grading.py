@@ -0,0 +1,237 @@
+# academy/grading.py
+"""
+In-memory quiz grading against a cached per-module answer key.
+"""
+import random
+import secrets
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Choice, Question, QuizDraw
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+
+def _content_version_key(module_id):
+    return f"academy:quiz_content_v:{module_id}"
+
+
+def _new_version():
+    return time.time_ns() // 1000
+
+
+def _content_version(module_id):
+    return cache.get_or_set(_content_version_key(module_id), _new_version, None)
+
+
+def invalidate_answer_key(*module_ids):
+    """
+    Bump the content version of each module so its answer key is rebuilt.
+    Called when Question or Choice rows change (see academy/signals.py).
+    """
+    keys = [_content_version_key(m) for m in {m for m in module_ids if m}]
+    for key in keys:
+        cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set_many({key: _new_version() for key in keys}, None))
+
+
+def get_answer_key(module):
+    """
+    Return the module's answer key, cached by module + content version:
+
+        {
+            question_id: {
+                "text": str,
+                "explanation": str,
+                "choices": {choice_id: choice_text},
+                "correct": frozenset(choice_ids),
+            },
+            ...
+        }
+
+    Questions keep the module's question ordering (dicts are ordered).
+    """
+    key = f"academy:answer_key:{module.pk}:{_content_version(module.pk)}"
+    answer_key = cache.get(key)
+    if answer_key is not None:
+        return answer_key
+
+    answer_key = {
+        pk: {"text": text, "explanation": explanation, "choices": {}, "correct": set()}
+        for pk, text, explanation in (
+            Question.objects
+            .filter(module=module)
+            .values_list("pk", "text", "explanation")
+        )
+    }
+    for question_id, pk, text, is_correct in (
+        Choice.objects
+        .filter(question__module=module)
+        .order_by("pk")
+        .values_list("question_id", "pk", "text", "is_correct")
+    ):
+        entry = answer_key[question_id]
+        entry["choices"][pk] = text
+        if is_correct:
+            entry["correct"].add(pk)
+
+    for entry in answer_key.values():
+        entry["correct"] = frozenset(entry["correct"])
+
+    cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def grade_submission(answer_key, data, question_ids=None):
+    """
+    Grade a submission in one pass with no queries.
+
+    'data' is a mapping like request.POST with "question_<id>" -> choice id.
+    'question_ids' limits grading to a subset (defaults to the whole key).
+    Returns {"results": [...], "correct_count", "total_questions", "score_percent"}.
+    """
+    if question_ids is None:
+        question_ids = list(answer_key)
+
+    results = []
+    correct_count = 0
+
+    for question_id in question_ids:
+        entry = answer_key.get(question_id)
+        if entry is None:
+            continue
+
+        selected_id = None
+        raw = data.get(f"question_{question_id}")
+        if raw:
+            try:
+                raw = int(raw)
+            except (TypeError, ValueError):
+                raw = None
+            if raw in entry["choices"]:
+                selected_id = raw
+
+        is_correct = selected_id is not None and selected_id in entry["correct"]
+        if is_correct:
+            correct_count += 1
+
+        results.append({
+            "question_id": question_id,
+            "selected_choice_id": selected_id,
+            "is_correct": is_correct,
+        })
+
+    total = len(results)
+    return {
+        "results": results,
+        "correct_count": correct_count,
+        "total_questions": total,
+        "score_percent": int((correct_count / total) * 100) if total else 0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Question pools
+# ---------------------------------------------------------------------------
+# A module with questions_per_attempt set draws that many questions from its
+# pool (the answer key) for each attempt, optionally shuffling choices. The
+# draw is saved as a QuizDraw row and its token is posted back with the
+# answers; grading claims (loads and deletes) the row in the submit
+# transaction, so a draw is graded exactly once on whichever worker gets it.
+
+DRAW_TIMEOUT = 60 * 60 * 3
+
+
+def uses_pool(module):
+    return bool(module.questions_per_attempt) or module.shuffle_choices
+
+
+def draw_questions(module, answer_key, rng=None):
+    """
+    Return {"question_ids": [...], "choice_order": {question_id: [choice_ids]}}
+    for one attempt. Without a pool this is every question, in order.
+    """
+    rng = rng or random.SystemRandom()
+    question_ids = list(answer_key)
+
+    size = module.questions_per_attempt
+    if size and size < len(question_ids):
+        question_ids = rng.sample(question_ids, size)
+    elif size:
+        rng.shuffle(question_ids)
+
+    choice_order = {}
+    for question_id in question_ids:
+        choice_ids = list(answer_key[question_id]["choices"])
+        if module.shuffle_choices:
+            rng.shuffle(choice_ids)
+        choice_order[question_id] = choice_ids
+
+    return {"question_ids": question_ids, "choice_order": choice_order}
+
+
+def store_draw(user, module, draw):
+    """
+    Save a pooled draw and return its token ("" for modules without a pool,
+    which always draw the same questions).
+    """
+    if not uses_pool(module):
+        return ""
+    token = secrets.token_urlsafe(12)
+    QuizDraw.objects.create(token=token, user=user, module=module, draw=draw)
+    return token
+
+
+def claim_draw(user, module, token):
+    """
+    Load and delete the draw for a submission, or None if it is unknown,
+    expired or already graded. Call inside the submit transaction: a second
+    submission of the same token waits on the row lock, then finds nothing.
+    Expired draws (quizzes opened but never submitted) are cleared out here,
+    on submit rather than on every quiz page view.
+    """
+    if not token:
+        return None
+    cutoff = timezone.now() - timedelta(seconds=DRAW_TIMEOUT)
+    QuizDraw.objects.filter(created_at__lt=cutoff).delete()
+    row = (
+        QuizDraw.objects
+        .select_for_update()
+        .filter(token=token, user=user, module=module, created_at__gte=cutoff)
+        .first()
+    )
+    if row is None:
+        return None
+    row.delete()
+    # JSON object keys come back as strings
+    return {
+        "question_ids": row.draw["question_ids"],
+        "choice_order": {int(pk): choices for pk, choices in row.draw["choice_order"].items()},
+    }
+
+
+def draw_items(answer_key, draw):
+    """
+    Questions of a draw ready for the quiz templates:
+    [{"id", "text", "explanation", "choices": [{"id", "text"}]}]
+    """
+    items = []
+    for question_id in draw["question_ids"]:
+        entry = answer_key.get(question_id)
+        if entry is None:
+            continue
+        items.append({
+            "id": question_id,
+            "text": entry["text"],
+            "explanation": entry["explanation"],
+            "choices": [
+                {"id": choice_id, "text": entry["choices"][choice_id]}
+                for choice_id in draw["choice_order"].get(question_id, [])
+                if choice_id in entry["choices"]
+            ],
+        })
+    return items
@@ -0,0 +1,372 @@
+# academy/lesson_content.py
+"""
+Lesson content rendering.
+
+Lesson.content is authored as HTML or markdown. It is converted and
+sanitised once, when the lesson is saved, into Lesson.rendered_html; the
+lesson pages only output that field. Lesson.content_hash records which
+content (and which renderer version) the stored HTML came from, so unchanged
+lessons are never re-rendered and a renderer change can be rolled out with
+the academy_rebuild_lesson_html command.
+
+Everything here is standard library: a small markdown subset (headings,
+paragraphs, lists, quotes, code, rules, emphasis, links, images, plus inline
+HTML tags such as <b> or <br>) and an allow-list HTML sanitiser.
+"""
+import hashlib
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+# Bump when the output of render_lesson_content changes
+RENDERER_VERSION = 3
+REBUILD_BATCH_SIZE = 200
+
+
+def lesson_content_hash(content):
+    payload = f"{RENDERER_VERSION}\n{content or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Markdown
+# ---------------------------------------------------------------------------
+
+# Content containing any of these block tags is treated as HTML, not
+# markdown; inline tags alone (see _INLINE_TAG) don't count
+_HTML_HINT = re.compile(
+    r"<\s*/?\s*(p|div|hr|h[1-6]|ul|ol|li|dl|table|iframe|blockquote|pre|"
+    r"section|article|figure|video|audio)\b",
+    re.IGNORECASE,
+)
+# Inline HTML kept as-is inside markdown text (and sanitised afterwards)
+_INLINE_TAG = re.compile(
+    r"</?(a|abbr|b|br|code|del|em|i|img|ins|kbd|mark|s|small|span|strong|sub|sup|u)\b[^<>]*>",
+    re.IGNORECASE,
+)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_UL_ITEM = re.compile(r"^\s*[-*+]\s+(.*)$")
+_OL_ITEM = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s*>\s?(.*)$")
+
+_CODE_SPAN = re.compile(r"`([^`]+)`")
+# Link targets may contain one level of balanced parentheses, e.g. Foo_(bar)
+_URL = r"((?:[^()\s]|\([^()\s]*\))+)"
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(" + _URL + r"(?:\s+&quot;([^&]*)&quot;)?\)")
+_LINK = re.compile(r"\[([^\]]+)\]\(" + _URL + r"(?:\s+&quot;([^&]*)&quot;)?\)")
+_BOLD = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_ITALIC = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+
+
+def looks_like_html(content):
+    return bool(_HTML_HINT.search(content or ""))
+
+
+def _inline(text):
+    """
+    Inline markdown on a single block of text. Inline HTML tags are kept for
+    the sanitiser; any other raw HTML is escaped.
+    """
+    # Code spans and inline tags are protected from further inline processing
+    kept = []
+
+    def stash(html):
+        kept.append(html)
+        return f"\x00{len(kept) - 1}\x00"
+
+    text = _CODE_SPAN.sub(lambda m: stash(f"<code>{escape(m.group(1), quote=True)}</code>"), text)
+    text = _INLINE_TAG.sub(lambda m: stash(m.group(0)), text)
+    text = escape(text, quote=True)
+
+    def image(match):
+        alt, src, title = match.groups()
+        title_attr = f' title="{title}"' if title else ""
+        return f'<img src="{src}" alt="{alt}"{title_attr}>'
+
+    def link(match):
+        label, href, title = match.groups()
+        title_attr = f' title="{title}"' if title else ""
+        return f'<a href="{href}"{title_attr}>{label}</a>'
+
+    text = _IMAGE.sub(image, text)
+    text = _LINK.sub(link, text)
+    text = _BOLD.sub(r"<strong>\2</strong>", text)
+    text = _ITALIC.sub(r"<em>\2</em>", text)
+    text = re.sub(r" {2,}\n", "<br>\n", text)
+
+    return re.sub(r"\x00(\d+)\x00", lambda m: kept[int(m.group(1))], text)
+
+
+def markdown_to_html(content):
+    lines = (content or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    out = []
+    paragraph = []
+    list_tag = None
+    list_items = []
+    quote = []
+
+    def close_paragraph():
+        if paragraph:
+            out.append(f"<p>{_inline(chr(10).join(paragraph))}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            items = "".join(f"<li>{_inline(item)}</li>" for item in list_items)
+            out.append(f"<{list_tag}>{items}</{list_tag}>")
+            list_items.clear()
+            list_tag = None
+
+    def close_quote():
+        if quote:
+            out.append(f"<blockquote>{markdown_to_html(chr(10).join(quote))}</blockquote>")
+            quote.clear()
+
+    def close_all():
+        close_paragraph()
+        close_list()
+        close_quote()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        fence = _FENCE.match(line)
+        if fence:
+            close_all()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            out.append(f"<pre><code>{escape(chr(10).join(code), quote=False)}</code></pre>")
+            i += 1
+            continue
+
+        quoted = _QUOTE.match(line)
+        if quoted:
+            close_paragraph()
+            close_list()
+            quote.append(quoted.group(1))
+            i += 1
+            continue
+        close_quote()
+
+        if not line.strip():
+            close_paragraph()
+            close_list()
+        elif _RULE.match(line):
+            close_all()
+            out.append("<hr>")
+        elif _HEADING.match(line):
+            close_all()
+            hashes, text = _HEADING.match(line).groups()
+            out.append(f"<h{len(hashes)}>{_inline(text)}</h{len(hashes)}>")
+        elif _UL_ITEM.match(line) or _OL_ITEM.match(line):
+            close_paragraph()
+            tag = "ul" if _UL_ITEM.match(line) else "ol"
+            if list_tag != tag:
+                close_list()
+                list_tag = tag
+            list_items.append((_UL_ITEM.match(line) or _OL_ITEM.match(line)).group(1))
+        elif list_tag and line.startswith((" ", "\t")):
+            # Continuation of the previous list item
+            list_items[-1] += "\n" + line.strip()
+        else:
+            close_list()
+            paragraph.append(line)
+        i += 1
+
+    close_all()
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Sanitiser
+# ---------------------------------------------------------------------------
+
+ALLOWED_TAGS = {
+    "a", "abbr", "article", "audio", "b", "blockquote", "br", "caption", "code", "dd",
+    "del", "div", "dl", "dt", "em", "figcaption", "figure", "h1", "h2", "h3", "h4",
+    "h5", "h6", "hr", "i", "iframe", "img", "ins", "kbd", "li", "mark", "ol", "p",
+    "pre", "s", "section", "small", "source", "span", "strong", "sub", "sup", "table",
+    "tbody", "td", "tfoot", "th", "thead", "tr", "track", "u", "ul", "video",
+}
+VOID_TAGS = {"br", "hr", "img", "source", "track"}
+# Dropped together with everything inside them
+DROP_CONTENT_TAGS = {
+    "script", "style", "object", "embed", "applet", "noscript", "template",
+    "textarea", "select", "title", "head", "svg", "math", "form",
+}
+
+GLOBAL_ATTRIBUTES = {"class", "id", "title", "style"}
+TAG_ATTRIBUTES = {
+    "a": {"href", "target", "rel"},
+    "img": {"src", "alt", "width", "height", "loading"},
+    "iframe": {"src", "width", "height", "allow", "allowfullscreen", "frameborder"},
+    "td": {"colspan", "rowspan", "align"},
+    "th": {"colspan", "rowspan", "align", "scope"},
+    "ol": {"start", "type"},
+    "video": {"src", "poster", "controls", "width", "height", "preload", "loop", "muted", "playsinline"},
+    "audio": {"src", "controls", "preload", "loop", "muted"},
+    "source": {"src", "type", "media"},
+    "track": {"src", "kind", "srclang", "label", "default"},
+}
+URL_ATTRIBUTES = {"href", "src", "poster"}
+ALLOWED_SCHEMES = {"http", "https", "mailto", "tel"}
+# Only video players may be embedded
+IFRAME_HOSTS = {
+    "www.youtube.com", "youtube.com", "www.youtube-nocookie.com", "player.vimeo.com",
+}
+
+_SCHEME = re.compile(r"^([a-z][a-z0-9+.\-]*):")
+_UNSAFE_CSS = re.compile(r"url\s*\(|expression\s*\(|javascript:|@import|behavior\s*:", re.IGNORECASE)
+_CONTROL = re.compile(r"[\x00-\x20\x7f]+")
+_DATA_ATTRIBUTE = re.compile(r"^data-[a-z0-9_.\-]+$")
+
+
+def _safe_url(value):
+    cleaned = _CONTROL.sub("", unescape(value)).lower()
+    scheme = _SCHEME.match(cleaned)
+    return scheme is None or scheme.group(1) in ALLOWED_SCHEMES
+
+
+def _safe_iframe_src(value):
+    try:
+        parts = urlsplit(value.strip())
+    except ValueError:
+        return False
+    return parts.scheme == "https" and parts.hostname in IFRAME_HOSTS
+
+
+class _Sanitiser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []        # allowed tags currently open
+        self.dropping = []    # DROP_CONTENT_TAGS currently open
+
+    def _attributes(self, tag, attrs):
+        allowed = GLOBAL_ATTRIBUTES | TAG_ATTRIBUTES.get(tag, set())
+        kept = {}
+        for name, value in attrs:
+            name = name.lower()
+            value = value or ""
+            if (name not in allowed and not _DATA_ATTRIBUTE.match(name)) or name.startswith("on"):
+                continue
+            if name in URL_ATTRIBUTES and not _safe_url(value):
+                continue
+            if name == "style" and _UNSAFE_CSS.search(unescape(value)):
+                continue
+            kept[name] = value
+
+        if tag == "a" and kept.get("target") == "_blank":
+            kept["rel"] = "noopener noreferrer"
+        return kept
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        if self.dropping:
+            if tag in DROP_CONTENT_TAGS:
+                self.dropping.append(tag)
+            return
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping.append(tag)
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attributes = self._attributes(tag, attrs)
+        if tag == "iframe" and not _safe_iframe_src(attributes.get("src", "")):
+            self.dropping.append(tag)
+            return
+
+        rendered = "".join(
+            f' {name}="{escape(value, quote=True)}"' if value else f" {name}"
+            for name, value in attributes.items()
+        )
+        self.out.append(f"<{tag}{rendered}>")
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        dropping, opened = len(self.dropping), len(self.open)
+        self.handle_starttag(tag, attrs)
+        # A self-closed element has no content to drop or leave open
+        del self.dropping[dropping:]
+        if len(self.open) > opened:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if self.dropping:
+            if tag == self.dropping[-1]:
+                self.dropping.pop()
+                return
+            if tag not in self.open:
+                return
+            # An unclosed drop tag ends with its parent, not the document
+            self.dropping.clear()
+        if tag not in self.open:
+            return
+        # Close anything left open inside this element
+        while self.open:
+            current = self.open.pop()
+            self.out.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        self.out.extend(f"</{tag}>" for tag in reversed(self.open))
+        self.open = []
+        return "".join(self.out)
+
+
+def sanitise_html(html):
+    parser = _Sanitiser()
+    parser.feed(html or "")
+    return parser.result()
+
+
+def render_lesson_content(content):
+    """
+    Lesson content (HTML or markdown) to safe HTML.
+    """
+    html = content if looks_like_html(content) else markdown_to_html(content)
+    return sanitise_html(html)
+
+
+def rebuild_rendered_html(lessons, force=False, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Re-render the lessons in a queryset whose stored HTML is out of date
+    (or all of them with force=True). Returns the number updated.
+    Run by the academy_rebuild_lesson_html command (also in the release
+    phase), never from migrations, which must not depend on this code.
+    """
+    updated = []
+    count = 0
+    for lesson in lessons.only("pk", "content", "content_hash").iterator(chunk_size=batch_size):
+        content_hash = lesson_content_hash(lesson.content)
+        if not force and lesson.content_hash == content_hash:
+            continue
+        lesson.rendered_html = render_lesson_content(lesson.content)
+        lesson.content_hash = content_hash
+        updated.append(lesson)
+        if len(updated) >= batch_size:
+            lessons.model.objects.bulk_update(updated, ["rendered_html", "content_hash"])
+            count += len(updated)
+            updated = []
+    if updated:
+        lessons.model.objects.bulk_update(updated, ["rendered_html", "content_hash"])
+        count += len(updated)
+    return count
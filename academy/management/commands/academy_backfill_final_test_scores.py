@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from academy.models import FinalTestSubmission
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill score_percent / correct_count / total_questions on final test "
+        "submissions from their stored answers JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalculate every submission, not only rows missing a score.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        submissions = FinalTestSubmission.objects.only("pk", "answers").order_by("pk")
+        if not options["all"]:
+            submissions = submissions.filter(score_percent__isnull=True)
+
+        batch = []
+        updated = 0
+        for s in submissions.iterator(chunk_size=batch_size):
+            s.correct_count, s.total_questions, s.score_percent = (
+                FinalTestSubmission.summarise_answers(s.answers)
+            )
+            batch.append(s)
+
+            if len(batch) >= batch_size:
+                FinalTestSubmission.objects.bulk_update(
+                    batch, ["correct_count", "total_questions", "score_percent"]
+                )
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            FinalTestSubmission.objects.bulk_update(
+                batch, ["correct_count", "total_questions", "score_percent"]
+            )
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} final test submission(s)."))
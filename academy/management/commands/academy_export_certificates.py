@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from academy.certificates import certificate_batch, stream_certificates_zip
+from academy.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every certificate for a course and/or issue date range to a ZIP "
+        "of PDFs. Uncached certificates are rendered in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", help="Course id or slug.")
+        parser.add_argument("--from", dest="date_from", help="Issued on or after (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", help="Issued on or before (YYYY-MM-DD).")
+        parser.add_argument("--output", "-o", required=True, help="ZIP file to write.")
+        parser.add_argument("--workers", type=int, default=None, help="Rendering processes (default: up to 4).")
+        parser.add_argument("--progress-every", type=int, default=50, help="Report progress every N certificates.")
+
+    def _date(self, value, option):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            # Well-formed but impossible, e.g. 2026-02-30
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"{option} must be a date in YYYY-MM-DD format.")
+        return parsed
+
+    def handle(self, *args, **options):
+        course = None
+        if options["course"]:
+            value = options["course"]
+            lookup = {"pk": int(value)} if value.isdigit() else {"slug": value}
+            course = Course.objects.filter(**lookup).first()
+            if course is None:
+                raise CommandError(f"Course {value} not found.")
+
+        certificates = certificate_batch(
+            course=course,
+            date_from=self._date(options["date_from"], "--from"),
+            date_to=self._date(options["date_to"], "--to"),
+        )
+
+        every = max(1, options["progress_every"])
+
+        def progress(done, total):
+            if done % every == 0 or done == total:
+                self.stderr.write(f"  {done}/{total} certificates")
+
+        with open(options["output"], "wb") as fh:
+            for chunk in stream_certificates_zip(certificates, workers=options["workers"], progress=progress):
+                fh.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Certificates written to {options['output']}."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academy.models import Course, Module
+from academy.question_export import EXPORT_FORMATS, export_queryset, stream_questions_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Export a module's or course's questions and choices as JSON, in the "
+        "custom or fixture format accepted by the question importer."
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument("--module", type=int, help="Module id to export.")
+        scope.add_argument("--course", help="Course id or slug to export.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="custom")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+
+    def handle(self, *args, **options):
+        module = course = None
+        if options["module"]:
+            module = Module.objects.filter(pk=options["module"]).first()
+            if module is None:
+                raise CommandError(f"Module {options['module']} not found.")
+        elif options["course"]:
+            value = options["course"]
+            lookup = {"pk": int(value)} if value.isdigit() else {"slug": value}
+            course = Course.objects.filter(**lookup).first()
+            if course is None:
+                raise CommandError(f"Course {value} not found.")
+
+        chunks = stream_questions_json(export_queryset(module=module, course=course), options["format"])
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Questions written to {options['output']}."))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from academy.assignments import REBUILD_BATCH_SIZE, rebuild_effective_assignments
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialised effective course assignments from direct "
+        "and group CourseAssignment rows (e.g. after bulk imports or raw SQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        created, deleted = rebuild_effective_assignments(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Effective assignments rebuilt: {created} added, {deleted} removed."
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from academy.catalogue import invalidate_course_catalogue
+from academy.lesson_content import REBUILD_BATCH_SIZE, rebuild_rendered_html
+from academy.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render lessons whose stored HTML no longer matches their content "
+        "or the current renderer version (e.g. after bulk edits or a renderer change)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render every lesson, even if up to date.")
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated = rebuild_rendered_html(
+            Lesson.objects.all(), force=options["all"], batch_size=options["batch_size"]
+        )
+        if updated:
+            # bulk_update skips signals; the app catalogue serves rendered_html
+            invalidate_course_catalogue(*Course.objects.values_list("pk", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Lesson HTML rebuilt: {updated} lesson(s) updated."))
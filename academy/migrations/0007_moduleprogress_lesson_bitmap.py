@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0006_courseassignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moduleprogress',
+            name='lesson_bitmap',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:23
+
+from django.db import migrations
+
+MAX_ORDER = 63
+
+
+def backfill_lesson_bitmaps(apps, schema_editor):
+    """
+    Populate ModuleProgress.lesson_bitmap from existing LessonProgress rows.
+    Modules whose lesson orders are duplicated or outside 1..63 are left at 0
+    (they keep using the LessonProgress count).
+    """
+    Lesson = apps.get_model("academy", "Lesson")
+    LessonProgress = apps.get_model("academy", "LessonProgress")
+    ModuleProgress = apps.get_model("academy", "ModuleProgress")
+
+    # lesson_id -> (module_id, bit), skipping modules that can't be mapped
+    lessons_by_module = {}
+    for pk, module_id, order in Lesson.objects.values_list("pk", "module_id", "order").iterator():
+        lessons_by_module.setdefault(module_id, []).append((pk, order))
+
+    bit_for_lesson = {}
+    for module_id, lessons in lessons_by_module.items():
+        orders = [order for _, order in lessons]
+        if len(set(orders)) != len(orders) or not all(1 <= o <= MAX_ORDER for o in orders):
+            continue
+        for pk, order in lessons:
+            bit_for_lesson[pk] = (module_id, 1 << (order - 1))
+
+    bitmaps = {}
+    for user_id, lesson_id in (
+        LessonProgress.objects
+        .filter(completed=True)
+        .values_list("user_id", "lesson_id")
+        .iterator()
+    ):
+        if lesson_id not in bit_for_lesson:
+            continue
+        module_id, bit = bit_for_lesson[lesson_id]
+        key = (user_id, module_id)
+        bitmaps[key] = bitmaps.get(key, 0) | bit
+
+    changed = []
+    for mp in ModuleProgress.objects.only("pk", "user_id", "module_id", "lesson_bitmap").iterator():
+        bitmap = bitmaps.get((mp.user_id, mp.module_id), 0)
+        if bitmap:
+            mp.lesson_bitmap = bitmap
+            changed.append(mp)
+
+    ModuleProgress.objects.bulk_update(changed, ["lesson_bitmap"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0007_moduleprogress_lesson_bitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_lesson_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0008_backfill_lesson_bitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='finaltestsubmission',
+            name='correct_count',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='finaltestsubmission',
+            name='score_percent',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='finaltestsubmission',
+            name='total_questions',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
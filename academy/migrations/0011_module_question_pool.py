@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0010_quiz_attempts_question_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='questions_per_attempt',
+            field=models.PositiveIntegerField(blank=True, help_text="Draw this many questions at random from the module's pool. Blank = all, in order.", null=True),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False),
+        ),
+    ]
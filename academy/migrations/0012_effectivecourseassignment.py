@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0011_module_question_pool'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectiveCourseAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('direct', 'Direct'), ('group', 'Group')], max_length=10)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_assignments', to='academy.course')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auth.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_course_assignments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'user'], name='academy_eff_course_user_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('group__isnull', True)), fields=('user', 'course'), name='uniq_effective_assignment_direct'), models.UniqueConstraint(condition=models.Q(('group__isnull', False)), fields=('user', 'course', 'group'), name='uniq_effective_assignment_group')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:40
+
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_effective_assignments(apps, schema_editor):
+    """
+    Materialise existing direct and group course assignments.
+    """
+    CourseAssignment = apps.get_model("academy", "CourseAssignment")
+    EffectiveCourseAssignment = apps.get_model("academy", "EffectiveCourseAssignment")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Membership = User.groups.through
+
+    rows = set(
+        (user_id, course_id, None)
+        for user_id, course_id in CourseAssignment.objects.filter(user__isnull=False).values_list("user_id", "course_id")
+    )
+
+    members = {}
+    for user_id, group_id in Membership.objects.values_list("user_id", "group_id").iterator():
+        members.setdefault(group_id, []).append(user_id)
+
+    for group_id, course_id in CourseAssignment.objects.filter(group__isnull=False).values_list("group_id", "course_id"):
+        for user_id in members.get(group_id, []):
+            rows.add((user_id, course_id, group_id))
+
+    EffectiveCourseAssignment.objects.bulk_create(
+        [
+            EffectiveCourseAssignment(
+                user_id=user_id,
+                course_id=course_id,
+                group_id=group_id,
+                source="group" if group_id else "direct",
+            )
+            for user_id, course_id, group_id in rows
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0012_effectivecourseassignment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_effective_assignments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy', '0013_backfill_effective_assignments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
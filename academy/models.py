@@ -25,6 +25,12 @@ class Module(models.Model):
     order = models.PositiveIntegerField(default=1)
     min_score_to_pass = models.PositiveIntegerField(default=80)  # % required
     is_mandatory = models.BooleanField(default=True)
+    questions_per_attempt = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Draw this many questions at random from the module's pool. Blank = all, in order.",
+    )
+    shuffle_choices = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ("course", "slug")
@@ -41,6 +47,9 @@ class Lesson(models.Model):
     content = models.TextField(help_text="HTML or markdown content for this lesson.")
     video_url = models.URLField(blank=True, help_text="Optional YouTube / Vimeo link")
     image_url = models.URLField(blank=True, help_text="Optional image link")   # NEW FIELD ✔
+    # Sanitised HTML rendered from content on save (see academy/lesson_content.py)
+    rendered_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         ordering = ["order"]
@@ -48,6 +57,19 @@ class Lesson(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from .lesson_content import lesson_content_hash, render_lesson_content
+
+        # Only re-render when the content (or the renderer) has changed
+        content_hash = lesson_content_hash(self.content)
+        if content_hash != self.content_hash:
+            self.rendered_html = render_lesson_content(self.content)
+            self.content_hash = content_hash
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "content" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "rendered_html", "content_hash"}
+        super().save(*args, **kwargs)
+
 
 
 class Question(models.Model):
@@ -89,6 +111,14 @@ class ModuleProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     last_attempt_at = models.DateTimeField(null=True, blank=True)
 
+    # Completed lessons as bits: lesson.order N -> bit N-1 (see academy/progress.py)
+    lesson_bitmap = models.BigIntegerField(default=0)
+
+    # What progress updates save. lesson_bitmap is left out: it is only
+    # written atomically (set_lesson_bit, rebuild_lesson_bitmaps), and saving
+    # a stale copy would drop bits set concurrently.
+    PROGRESS_FIELDS = ("status", "score", "completed_at", "last_attempt_at")
+
     class Meta:
         unique_together = ("user", "module")
 
@@ -160,6 +190,12 @@ class FinalTestSubmission(models.Model):
     # ]
     answers = models.JSONField()
 
+    # Marking summary, denormalised from 'answers' so reviews can sort/filter in SQL.
+    # Null only for rows not yet backfilled (manage.py academy_backfill_final_test_scores).
+    score_percent = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    correct_count = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    total_questions = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+
     reviewed = models.BooleanField(default=False)
     is_passed = models.BooleanField(default=False)
     feedback = models.TextField(blank=True)
@@ -179,6 +215,21 @@ class FinalTestSubmission(models.Model):
     def __str__(self):
         return f"Final test – {self.user} – {self.module}"
 
+    @property
+    def incorrect_count(self):
+        return (self.total_questions or 0) - (self.correct_count or 0)
+
+    @staticmethod
+    def summarise_answers(answers):
+        """
+        (correct_count, total_questions, score_percent) from a stored answers list.
+        """
+        answers = answers or []
+        total = len(answers)
+        correct = sum(1 for a in answers if a.get("is_correct"))
+        score = int((correct / total) * 100) if total > 0 else 0
+        return correct, total, score
+
     def save(self, *args, **kwargs):
         from .models import ModuleProgress  # avoid circular import at top
 
@@ -196,7 +247,7 @@ class FinalTestSubmission(models.Model):
             now = timezone.now()
             mp.completed_at = mp.completed_at or now
             mp.last_attempt_at = now
-            mp.save()
+            mp.save(update_fields=ModuleProgress.PROGRESS_FIELDS)
 
 
 class ManagerDocument(models.Model):
@@ -229,3 +280,152 @@ class CourseAssignment(models.Model):
     def __str__(self):
         owner = self.user or self.group
         return f"{owner} → {self.course}"
+
+
+class EffectiveCourseAssignment(models.Model):
+    """
+    Materialised "who has which course": one row per user, course and source
+    (a direct CourseAssignment, or a group the user belongs to). Kept in sync
+    by academy/assignments.py; rebuild with `academy_rebuild_effective_assignments`.
+    """
+    SOURCE_DIRECT = "direct"
+    SOURCE_GROUP = "group"
+
+    SOURCE_CHOICES = (
+        (SOURCE_DIRECT, "Direct"),
+        (SOURCE_GROUP, "Group"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="effective_course_assignments",
+    )
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="effective_assignments")
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    group = models.ForeignKey(
+        "auth.Group",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "course"],
+                condition=models.Q(group__isnull=True),
+                name="uniq_effective_assignment_direct",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "course", "group"],
+                condition=models.Q(group__isnull=False),
+                name="uniq_effective_assignment_group",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["course", "user"], name="academy_eff_course_user_idx"),
+        ]
+
+    def __str__(self):
+        via = self.group.name if self.group_id else "direct"
+        return f"{self.user} → {self.course} ({via})"
+
+
+class QuizAttempt(models.Model):
+    """
+    One submitted practice quiz or final test. Answers are stored compactly
+    as {"<question_id>": <choice_id or null>} for later analysis.
+    """
+    KIND_QUIZ = "quiz"
+    KIND_FINAL = "final"
+
+    KIND_CHOICES = (
+        (KIND_QUIZ, "Practice quiz"),
+        (KIND_FINAL, "Final test"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="quiz_attempts",
+    )
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="attempts")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_QUIZ)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    answers = models.JSONField(default=dict)
+    correct_count = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+    score_percent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-submitted_at"]
+        indexes = [
+            models.Index(fields=["user", "module", "-submitted_at"], name="academy_attempt_user_mod_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} – {self.user} – {self.module} ({self.score_percent}%)"
+
+
+class QuizDraw(models.Model):
+    """
+    The questions drawn for one quiz or final test attempt (see academy/grading.py).
+    Its token is posted back with the answers, and the row is deleted when
+    that submission is graded, so each draw can be submitted once.
+    """
+    token = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="quiz_draws",
+    )
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="draws")
+    draw = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Draw – {self.user} – {self.module}"
+
+
+class QuestionStats(models.Model):
+    """
+    Running item-analysis counters per question, updated on every attempt
+    (see academy/analytics.py) so reports never scan QuizAttempt.
+    """
+    question = models.OneToOneField(
+        Question,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    unanswered = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats – {self.question}"
+
+    @property
+    def percent_correct(self):
+        if not self.attempts:
+            return None
+        return int((self.correct / self.attempts) * 100)
+
+
+class ChoiceStats(models.Model):
+    """
+    How often each choice was picked (distractor frequency).
+    """
+    choice = models.OneToOneField(
+        Choice,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    picks = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats – {self.choice}"
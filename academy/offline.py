@@ -0,0 +1,97 @@
+# academy/offline.py
+"""
+Offline lessons.
+
+The academy service worker (served from /academy/sw.js so its scope covers
+the whole academy) precaches a module's lesson pages from a per-module
+manifest. Each lesson entry carries a hash of everything its page shows,
+so the worker only re-downloads lessons that actually changed. Lesson
+completions made offline are queued by the worker and sent back in one
+batch request when the driver is online again.
+"""
+import hashlib
+
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+MAX_BATCH_COMPLETIONS = 200
+
+
+class CompletionBatchError(Exception):
+    pass
+
+
+def lesson_page_hash(lesson):
+    """
+    Changes whenever the lesson page would render differently
+    (content_hash already covers the content and the renderer version).
+    """
+    payload = "\n".join(
+        str(value) for value in (
+            lesson.content_hash, lesson.title, lesson.order, lesson.video_url, lesson.image_url,
+        )
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def module_manifest(course, module):
+    """
+    Precache manifest for one module: the module page, every lesson page with
+    its hash, and an overall version that changes if any of them change.
+    """
+    lessons = module.lessons.only("pk", "title", "order", "video_url", "image_url", "content_hash")
+    entries = [
+        {
+            "id": lesson.pk,
+            "url": reverse("academy_lesson_detail", args=[course.slug, module.slug, lesson.pk]),
+            "hash": lesson_page_hash(lesson),
+        }
+        for lesson in lessons
+    ]
+    version = hashlib.sha256(
+        "|".join(f"{e['id']}:{e['hash']}" for e in entries).encode("utf-8")
+    ).hexdigest()[:32]
+
+    return {
+        "module": module.pk,
+        "version": version,
+        "pages": [reverse("academy_module_detail", args=[course.slug, module.slug])],
+        "lessons": entries,
+    }
+
+
+def parse_completion_batch(data):
+    """
+    Validate a queued-completions payload:
+
+        {"lessons": [{"id": 12, "completed_at": "2026-10-19T08:30:00Z"}, ...]}
+
+    Returns {lesson_id: completed_at}. Offline timestamps are kept for the
+    audit trail, but never later than now.
+    """
+    items = data.get("lessons") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise CompletionBatchError("Expected {'lessons': [...]}.")
+    if len(items) > MAX_BATCH_COMPLETIONS:
+        raise CompletionBatchError(f"Send at most {MAX_BATCH_COMPLETIONS} completions at a time.")
+
+    now = timezone.now()
+    completions = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("id"), int) or isinstance(item["id"], bool):
+            raise CompletionBatchError("Each completion needs an integer 'id'.")
+
+        completed_at = None
+        if isinstance(item.get("completed_at"), str):
+            completed_at = parse_datetime(item["completed_at"])
+        if completed_at is None:
+            completed_at = now
+        elif timezone.is_naive(completed_at):
+            completed_at = timezone.make_aware(completed_at)
+        completed_at = min(completed_at, now)
+
+        # Keep the earliest time if a lesson was queued more than once
+        previous = completions.get(item["id"])
+        completions[item["id"]] = min(previous, completed_at) if previous else completed_at
+    return completions
@@ -0,0 +1,213 @@
+# academy/onboarding.py
+"""
+Bulk driver onboarding from a CSV upload.
+
+Columns (header row required; only username and email are mandatory):
+
+    username,email,first_name,last_name,courses,groups
+
+'courses' holds course slugs and 'groups' holds group names, each separated
+by ';'. Accounts are created with an unusable password, so nothing is hashed
+during the import; drivers set their own password from a one-time invite link.
+"""
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.mail import send_mass_mail
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.template.loader import render_to_string
+
+from allauth.account.models import EmailAddress
+
+from accounts.invites import invite_url
+from accounts.models import Profile
+
+from .assignments import refresh_effective_assignments
+from .compliance import invalidate_course_compliance, invalidate_group_compliance
+from .models import Course, CourseAssignment
+
+MAX_ONBOARDING_ROWS = 2000
+ONBOARDING_COLUMNS = ("username", "email", "first_name", "last_name", "courses", "groups")
+
+
+class OnboardingError(Exception):
+    pass
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(";") if part.strip()]
+
+
+def parse_onboarding_csv(uploaded_file):
+    """
+    Return a list of row dicts (with a 'line' number) from the upload.
+    """
+    try:
+        text = io.TextIOWrapper(getattr(uploaded_file, "file", uploaded_file), encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or not {"username", "email"} <= {
+            (name or "").strip().lower() for name in reader.fieldnames
+        }:
+            raise OnboardingError("The CSV needs a header row with at least 'username' and 'email'.")
+
+        rows = []
+        for line, raw in enumerate(reader, start=2):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items() if k}
+            if not any(row.values()):
+                continue
+            row["line"] = line
+            rows.append(row)
+            if len(rows) > MAX_ONBOARDING_ROWS:
+                raise OnboardingError(f"Upload at most {MAX_ONBOARDING_ROWS} drivers at a time.")
+        return rows
+    except UnicodeDecodeError:
+        raise OnboardingError("The file is not valid UTF-8 CSV.")
+    except csv.Error as exc:
+        raise OnboardingError(f"Invalid CSV: {exc}")
+
+
+def validate_onboarding_rows(rows):
+    """
+    Check every row in a fixed number of queries (existing users, courses,
+    groups). Returns (errors, courses_by_slug, groups_by_name).
+    """
+    User = get_user_model()
+    username_validator = User.username_validator
+    errors = []
+
+    usernames = {row.get("username", "").lower() for row in rows}
+    emails = {row.get("email", "").lower() for row in rows}
+
+    taken_usernames = set()
+    taken_emails = set()
+    for username, email in (
+        User.objects
+        .annotate(username_lower=Lower("username"), email_lower=Lower("email"))
+        .filter(Q(username_lower__in=usernames) | Q(email_lower__in=emails))
+        .values_list("username_lower", "email_lower")
+    ):
+        taken_usernames.add(username)
+        taken_emails.add(email)
+
+    course_slugs = {slug for row in rows for slug in _split(row.get("courses"))}
+    group_names = {name for row in rows for name in _split(row.get("groups"))}
+    courses_by_slug = {c.slug: c for c in Course.objects.filter(slug__in=course_slugs)}
+    groups_by_name = {g.name: g for g in Group.objects.filter(name__in=group_names)}
+
+    seen_usernames = set()
+    seen_emails = set()
+    for row in rows:
+        line = row["line"]
+        username = row.get("username", "")
+        email = row.get("email", "")
+
+        if not username:
+            errors.append(f"Line {line}: username is required.")
+        else:
+            try:
+                username_validator(username)
+            except ValidationError:
+                errors.append(f"Line {line}: '{username}' is not a valid username.")
+            if username.lower() in taken_usernames:
+                errors.append(f"Line {line}: username '{username}' already exists.")
+            elif username.lower() in seen_usernames:
+                errors.append(f"Line {line}: username '{username}' appears more than once.")
+            seen_usernames.add(username.lower())
+
+        if not email:
+            errors.append(f"Line {line}: email is required.")
+        else:
+            try:
+                validate_email(email)
+            except ValidationError:
+                errors.append(f"Line {line}: '{email}' is not a valid email address.")
+            if email.lower() in taken_emails:
+                errors.append(f"Line {line}: email '{email}' is already used by another account.")
+            elif email.lower() in seen_emails:
+                errors.append(f"Line {line}: email '{email}' appears more than once.")
+            seen_emails.add(email.lower())
+
+        for slug in _split(row.get("courses")):
+            if slug not in courses_by_slug:
+                errors.append(f"Line {line}: course '{slug}' not found.")
+        for name in _split(row.get("groups")):
+            if name not in groups_by_name:
+                errors.append(f"Line {line}: group '{name}' not found.")
+
+    return errors, courses_by_slug, groups_by_name
+
+
+def onboard_users(rows, courses_by_slug, groups_by_name):
+    """
+    Create users, profiles, email addresses, group memberships and course
+    assignments with one bulk insert each, in a single transaction.
+    Returns the created users in row order.
+    """
+    User = get_user_model()
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(
+                username=row["username"],
+                email=row["email"],
+                first_name=row.get("first_name", ""),
+                last_name=row.get("last_name", ""),
+                # Unusable password: cheap to generate, no PBKDF2 rounds
+                password=make_password(None),
+            )
+            for row in rows
+        ])
+        # Re-read so primary keys are available on every database backend
+        users_by_name = {u.username: u for u in User.objects.filter(username__in=[r["username"] for r in rows])}
+        users = [users_by_name[row["username"]] for row in rows]
+
+        # bulk_create skips post_save, so create what the signals would have
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        EmailAddress.objects.bulk_create([
+            EmailAddress(user=user, email=user.email, primary=True, verified=False)
+            for user in users
+        ])
+
+        memberships = []
+        assignments = []
+        for row, user in zip(rows, users):
+            for name in _split(row.get("groups")):
+                memberships.append(User.groups.through(user_id=user.pk, group_id=groups_by_name[name].pk))
+            for slug in _split(row.get("courses")):
+                assignments.append(CourseAssignment(user=user, course=courses_by_slug[slug]))
+        User.groups.through.objects.bulk_create(memberships, ignore_conflicts=True)
+        CourseAssignment.objects.bulk_create(assignments)
+        # Bulk inserts skip the signals that keep effective assignments in sync
+        refresh_effective_assignments([user.pk for user in users])
+        invalidate_group_compliance(*(m.group_id for m in memberships))
+        invalidate_course_compliance(*(a.course_id for a in assignments))
+
+    return users
+
+
+def send_invites(request, users):
+    """
+    Email each new driver their invite link over a single connection.
+    Returns [(user, url)] so the links can also be shown to the manager.
+    """
+    invites = [(user, invite_url(request, user)) for user in users]
+    send_mass_mail(
+        [
+            (
+                "[Cozy Academy] Your driver account is ready",
+                render_to_string("academy/emails/invite.txt", {"user": user, "invite_url": url}),
+                None,
+                [user.email],
+            )
+            for user, url in invites
+        ],
+        fail_silently=True,
+    )
+    return invites
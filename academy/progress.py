@@ -0,0 +1,212 @@
+# academy/progress.py
+"""
+Per-user progress helpers shared by the academy views.
+"""
+import time
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import LessonProgress, Module, ModuleProgress
+
+UNLOCK_MAP_TIMEOUT = 60 * 60
+
+
+def _course_version_key(course_id):
+    return f"academy:course_v:{course_id}"
+
+
+def _new_version():
+    # The clock in microseconds rather than a counter, so a version evicted
+    # from the cache never comes back as a number already used
+    return time.time_ns() // 1000
+
+
+def _course_version(course_id):
+    return cache.get_or_set(_course_version_key(course_id), _new_version, None)
+
+
+def _unlock_map_key(user_id, course_id):
+    return f"academy:unlock:{course_id}:{_course_version(course_id)}:{user_id}"
+
+
+def build_module_unlock_map(user, course):
+    """
+    Return {module_id: can_access} for every module in 'course'.
+
+    A module is unlocked when the user has passed every mandatory module with
+    a lower 'order' (passed = score >= module.min_score_to_pass). Uses one
+    query for the modules and one for the user's progress rows; the result is
+    cached per user + course.
+    """
+    key = _unlock_map_key(user.pk, course.pk)
+    unlock_map = cache.get(key)
+    if unlock_map is not None:
+        return unlock_map
+
+    modules = list(
+        Module.objects
+        .filter(course=course)
+        .order_by("order", "pk")
+        .values_list("pk", "order", "is_mandatory", "min_score_to_pass")
+    )
+    scores = dict(
+        ModuleProgress.objects
+        .filter(user=user, module__course=course)
+        .values_list("module_id", "score")
+    )
+
+    unlock_map = {}
+    blocked = False          # a mandatory module with a lower order is not passed
+    blocked_in_group = False  # same, but for the current 'order' value
+    current_order = None
+
+    for pk, order, is_mandatory, min_score in modules:
+        if order != current_order:
+            blocked = blocked or blocked_in_group
+            blocked_in_group = False
+            current_order = order
+
+        unlock_map[pk] = not blocked
+
+        if is_mandatory and scores.get(pk, -1) < min_score:
+            blocked_in_group = True
+
+    cache.set(key, unlock_map, UNLOCK_MAP_TIMEOUT)
+    return unlock_map
+
+
+def invalidate_module_unlock_map(user_id, course_id):
+    # Dropped now, for the rest of this request, and again once the
+    # transaction commits: the shared cache is outside the transaction, so
+    # another worker may have cached the old rows in between
+    key = _unlock_map_key(user_id, course_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_course_unlock_maps(course_id):
+    """
+    Module added/removed/reordered: every user's map for the course is stale.
+    """
+    key = _course_version_key(course_id)
+    cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), None))
+
+
+# ---------------------------------------------------------------------------
+# Lesson completion bitmap
+# ---------------------------------------------------------------------------
+# ModuleProgress.lesson_bitmap stores completed lessons as bits, keyed by
+# lesson.order (order 1 -> bit 0). BigIntegerField is signed, so orders
+# 1..63 are usable. Modules whose lesson orders are duplicated or out of
+# range fall back to counting LessonProgress rows, which are still written
+# on completion as the audit trail.
+
+LESSON_BITMAP_MAX_ORDER = 63
+
+
+def lesson_bit(order):
+    if order is None or not 1 <= order <= LESSON_BITMAP_MAX_ORDER:
+        return None
+    return 1 << (order - 1)
+
+
+def lesson_bitmap_layout(lessons):
+    """
+    Return {lesson_id: bit} for a module's lessons, or None if the orders
+    can't be mapped one-to-one onto bits.
+    """
+    layout = {}
+    seen = set()
+    for lesson in lessons:
+        bit = lesson_bit(lesson.order)
+        if bit is None or bit in seen:
+            return None
+        seen.add(bit)
+        layout[lesson.pk] = bit
+    return layout
+
+
+def set_lesson_bit(module_progress, lesson):
+    """
+    Atomically set the lesson's bit on the stored row (no read-modify-write race).
+    """
+    bit = lesson_bit(lesson.order)
+    if bit is None:
+        return
+    ModuleProgress.objects.filter(pk=module_progress.pk).update(
+        lesson_bitmap=F("lesson_bitmap").bitor(bit)
+    )
+    module_progress.lesson_bitmap |= bit
+
+
+def rebuild_lesson_bitmaps(module, batch_size=500):
+    """
+    Recompute lesson_bitmap for every ModuleProgress row of 'module' from the
+    LessonProgress audit rows. Called from academy/signals.py whenever a
+    lesson is added, moved, reordered or deleted. Returns the number of rows
+    updated, or None if the module can't use a bitmap.
+    """
+    layout = lesson_bitmap_layout(module.lessons.all())
+    if layout is None:
+        return None
+
+    bitmaps = {}
+    for user_id, lesson_id in (
+        LessonProgress.objects
+        .filter(lesson__module=module, completed=True)
+        .values_list("user_id", "lesson_id")
+        .iterator()
+    ):
+        bitmaps[user_id] = bitmaps.get(user_id, 0) | layout.get(lesson_id, 0)
+
+    rows = list(ModuleProgress.objects.filter(module=module).only("pk", "user_id", "lesson_bitmap"))
+    changed = []
+    for mp in rows:
+        bitmap = bitmaps.get(mp.user_id, 0)
+        if mp.lesson_bitmap != bitmap:
+            mp.lesson_bitmap = bitmap
+            changed.append(mp)
+
+    ModuleProgress.objects.bulk_update(changed, ["lesson_bitmap"], batch_size=batch_size)
+    return len(changed)
+
+
+# ---------------------------------------------------------------------------
+# Driver progress matrix
+# ---------------------------------------------------------------------------
+
+ProgressCell = namedtuple("ProgressCell", "status score completed_at")
+
+
+def driver_progress_matrix(user_ids, modules):
+    """
+    Return {user_id: [ProgressCell or None, ...]} with one slot per module
+    (same order as 'modules'), built from a single users LEFT JOIN
+    ModuleProgress query. Users with no progress get a row of None.
+    """
+    index = {module.pk: i for i, module in enumerate(modules)}
+    width = len(index)
+    matrix = {user_id: [None] * width for user_id in user_ids}
+
+    rows = (
+        get_user_model().objects
+        .filter(pk__in=user_ids)
+        .values_list(
+            "pk",
+            "moduleprogress__module_id",
+            "moduleprogress__status",
+            "moduleprogress__score",
+            "moduleprogress__completed_at",
+        )
+    )
+    for user_id, module_id, status, score, completed_at in rows:
+        slot = index.get(module_id)
+        if slot is not None:
+            matrix[user_id][slot] = ProgressCell(status, score, completed_at)
+
+    return matrix
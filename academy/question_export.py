@@ -0,0 +1,86 @@
+# academy/question_export.py
+"""
+Question bank export in the two formats accepted by academy/question_import.py
+("custom" and Django "fixture"), streamed as JSON text.
+"""
+import json
+
+from django.db.models import Prefetch
+
+from .models import Choice, Question
+
+EXPORT_FORMATS = ("custom", "fixture")
+EXPORT_CHUNK_SIZE = 500
+
+
+def export_queryset(module=None, course=None):
+    """
+    Questions for one module or one course (or everything), with choices
+    prefetched: two queries per chunk of EXPORT_CHUNK_SIZE questions.
+    """
+    questions = (
+        Question.objects
+        .select_related("module__course")
+        .prefetch_related(Prefetch("choices", queryset=Choice.objects.order_by("pk")))
+        .order_by("module__course__order", "module__order", "module_id", "order", "pk")
+    )
+    if module is not None:
+        questions = questions.filter(module=module)
+    if course is not None:
+        questions = questions.filter(module__course=course)
+    return questions
+
+
+def _custom_entries(question):
+    yield {
+        "text": question.text,
+        "order": question.order,
+        "explanation": question.explanation,
+        "course_slug": question.module.course.slug,
+        "module_slug": question.module.slug,
+        "choices": [
+            {"text": choice.text, "is_correct": choice.is_correct}
+            for choice in question.choices.all()
+        ],
+    }
+
+
+def _fixture_entries(question):
+    # Each question is followed by its choices, as the importer expects
+    yield {
+        "model": "academy.question",
+        "pk": question.pk,
+        "fields": {
+            "module": question.module_id,
+            "text": question.text,
+            "order": question.order,
+            "explanation": question.explanation,
+        },
+    }
+    for choice in question.choices.all():
+        yield {
+            "model": "academy.choice",
+            "pk": choice.pk,
+            "fields": {
+                "question": question.pk,
+                "text": choice.text,
+                "is_correct": choice.is_correct,
+            },
+        }
+
+
+def stream_questions_json(questions, fmt="custom"):
+    """
+    Yield a JSON array of the given questions, one element per chunk.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    entries_for = _fixture_entries if fmt == "fixture" else _custom_entries
+
+    yield "["
+    separator = "\n"
+    for question in questions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        for entry in entries_for(question):
+            yield separator + json.dumps(entry, ensure_ascii=False)
+            separator = ",\n"
+    yield "\n]\n"
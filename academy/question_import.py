@@ -0,0 +1,331 @@
+# academy/question_import.py
+"""
+Bulk question import from JSON uploads.
+
+Two formats are accepted (both a top-level JSON array):
+
+  A. Django fixture format:
+     [{"model": "academy.question", "pk": 1, "fields": {"module": 3, "text": ..., "order": 1, "explanation": ...}},
+      {"model": "academy.choice", "pk": 1, "fields": {"question": 1, "text": ..., "is_correct": true}}, ...]
+
+  B. Custom format:
+     [{"text": ..., "order": 1, "explanation": ..., "course_slug": "...", "module_slug": "...",
+       "choices": [{"text": ..., "is_correct": true}, ...]}, ...]
+
+     Module slugs are only unique within a course, so an entry's module is
+     looked up by (course_slug, module_slug); without course_slug the chosen
+     module's course is used, and without module_slug the chosen module.
+     An entry whose module can't be found is an error.
+
+The upload is parsed one array element at a time, modules are resolved from
+one query, and rows are written with bulk_create inside a single transaction,
+so a failure leaves nothing behind.
+"""
+import codecs
+import json
+
+from django.db import transaction
+
+from .catalogue import invalidate_course_catalogue
+from .grading import invalidate_answer_key
+from .models import Choice, Module, Question
+
+IMPORT_BATCH_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 20
+
+_CHOICE_TEXT_MAX = Choice._meta.get_field("text").max_length
+
+
+class QuestionImportError(Exception):
+    pass
+
+
+def iter_json_array(fileobj, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array without loading the whole
+    document. Raises QuestionImportError on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        else:
+            buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    try:
+        while True:
+            skip(" \t\r\n")
+            if not started:
+                if pos >= len(buffer) or buffer[pos] != "[":
+                    raise QuestionImportError("Expected a JSON array of questions.")
+                pos += 1
+                started = True
+                continue
+
+            skip(" \t\r\n,")
+            if pos >= len(buffer):
+                raise QuestionImportError("Unexpected end of file (missing ']').")
+            if buffer[pos] == "]":
+                return
+
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as exc:
+                    if eof:
+                        raise QuestionImportError(f"Invalid JSON format: {exc.msg}.")
+                    fill()
+                    continue
+                # A number at the very end of the buffer may be cut short
+                if end == len(buffer) and not eof and not isinstance(value, (dict, list, str)):
+                    fill()
+                    continue
+                break
+            pos = end
+            yield value
+    except UnicodeDecodeError:
+        raise QuestionImportError("The file is not valid UTF-8.")
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _int(value, default=1):
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        raise ValueError
+    return int(value)
+
+
+class _Importer:
+    def __init__(self, default_module, dry_run):
+        self.default_module = default_module
+        self.dry_run = dry_run
+        self.module_ids = set()
+        self.modules_by_slug = {}   # (course slug, module slug) -> module id
+        self.course_ids = {}   # module id -> course id
+        self.default_course_slug = None
+        for pk, slug, course_id, course_slug in (
+            Module.objects.values_list("pk", "slug", "course_id", "course__slug")
+        ):
+            self.module_ids.add(pk)
+            self.modules_by_slug[(course_slug, slug)] = pk
+            self.course_ids[pk] = course_id
+            if pk == default_module.pk:
+                self.default_course_slug = course_slug
+
+        self.questions = 0
+        self.choices = 0
+        self.skipped = 0
+        self.errors = []
+        self.touched_modules = set()
+
+        # Pending rows for the next bulk_create. Questions are keyed so their
+        # choices can be attached once the question rows have primary keys.
+        self._pending_questions = []   # [(key, Question)]
+        self._pending_choices = []     # [(key, Choice)]
+        self._known_keys = set()
+        self.question_ids = {}         # key -> created Question pk
+
+    # -- errors ---------------------------------------------------------------
+
+    def error(self, index, message):
+        self.errors.append(f"Entry {index + 1}: {message}")
+
+    # -- rows -----------------------------------------------------------------
+
+    def add_question(self, key, module_id, fields, index):
+        text = _text(fields.get("text"))
+        if not text:
+            self.error(index, "question text is empty.")
+            return False
+        try:
+            order = _int(fields.get("order"))
+        except (TypeError, ValueError):
+            self.error(index, "question order must be a whole number.")
+            return False
+
+        self._pending_questions.append((key, Question(
+            module_id=module_id,
+            text=text,
+            order=order,
+            explanation=fields.get("explanation") or "",
+        )))
+        self._known_keys.add(key)
+        self.touched_modules.add(module_id)
+        self.questions += 1
+        return True
+
+    def add_choice(self, key, fields, index):
+        text = _text(fields.get("text"))
+        if not text:
+            self.error(index, "choice text is empty.")
+            return
+        if len(text) > _CHOICE_TEXT_MAX:
+            self.error(index, f"choice text is longer than {_CHOICE_TEXT_MAX} characters.")
+            return
+
+        self._pending_choices.append((key, Choice(
+            text=text,
+            is_correct=bool(fields.get("is_correct", False)),
+        )))
+        self.choices += 1
+
+    def flush(self, force=False):
+        if not force and len(self._pending_questions) < IMPORT_BATCH_SIZE:
+            return
+        if not self.dry_run and not self.errors:
+            created = Question.objects.bulk_create([q for _, q in self._pending_questions])
+            ids = {key: q.pk for (key, _), q in zip(self._pending_questions, created)}
+            self.question_ids.update(ids)
+
+            ready, waiting = [], []
+            for key, choice in self._pending_choices:
+                if key in self.question_ids:
+                    choice.question_id = self.question_ids[key]
+                    ready.append(choice)
+                else:
+                    waiting.append((key, choice))
+            Choice.objects.bulk_create(ready, batch_size=IMPORT_BATCH_SIZE)
+            self._pending_choices = waiting
+        else:
+            self._pending_choices = []
+        self._pending_questions = []
+
+    # -- formats --------------------------------------------------------------
+
+    def fixture_entry(self, obj, index):
+        model = obj.get("model")
+        fields = obj.get("fields")
+        if not isinstance(fields, dict):
+            self.skipped += 1
+            return
+
+        if model == "academy.question":
+            module_id = self.default_module.pk
+            mod_id = fields.get("module")
+            if mod_id in self.module_ids:
+                module_id = mod_id
+            self.add_question(("fixture", obj.get("pk")), module_id, fields, index)
+
+        elif model == "academy.choice":
+            key = ("fixture", fields.get("question"))
+            # The question must appear earlier in the file
+            if key not in self._known_keys:
+                self.skipped += 1
+                return
+            self.add_choice(key, fields, index)
+
+        else:
+            self.skipped += 1
+
+    def custom_entry(self, entry, index):
+        if "text" not in entry or "choices" not in entry:
+            self.skipped += 1
+            return
+        if not isinstance(entry["choices"], list):
+            self.error(index, "'choices' must be a list.")
+            return
+
+        module_id = self.default_module.pk
+        module_slug = entry.get("module_slug")
+        if module_slug:
+            course_slug = entry.get("course_slug") or self.default_course_slug
+            module_id = self.modules_by_slug.get((course_slug, module_slug))
+            if module_id is None:
+                self.error(index, f"module '{module_slug}' not found in course '{course_slug}'.")
+                return
+        key = ("entry", index)
+        if not self.add_question(key, module_id, entry, index):
+            return
+        for choice in entry["choices"]:
+            if not isinstance(choice, dict):
+                self.error(index, "each choice must be an object.")
+                continue
+            self.add_choice(key, choice, index)
+
+
+def import_questions(fileobj, default_module, delete_existing=False, dry_run=False):
+    """
+    Import questions from an uploaded JSON file. Returns a summary dict:
+
+        {"questions", "choices", "skipped", "deleted", "errors", "dry_run"}
+
+    With dry_run=True the file is fully parsed and validated, but nothing is
+    written. If any entry is invalid, nothing is written either; the errors
+    are returned (up to MAX_REPORTED_ERRORS).
+    """
+    importer = _Importer(default_module, dry_run)
+    deleted = 0
+
+    try:
+        with transaction.atomic():
+            if delete_existing:
+                existing = Question.objects.filter(module=default_module)
+                deleted = existing.count()
+                if not dry_run:
+                    existing.delete()
+
+            fixture_format = None
+            for index, entry in enumerate(iter_json_array(fileobj)):
+                if not isinstance(entry, dict):
+                    importer.skipped += 1
+                    continue
+                if fixture_format is None:
+                    fixture_format = "model" in entry and "fields" in entry
+
+                if fixture_format:
+                    importer.fixture_entry(entry, index)
+                else:
+                    importer.custom_entry(entry, index)
+                importer.flush()
+
+            importer.flush(force=True)
+
+            if importer.errors and not dry_run:
+                # Roll back everything written so far (including the delete)
+                raise QuestionImportError("The import was cancelled because some entries are invalid.")
+    except QuestionImportError as exc:
+        if not importer.errors:
+            raise
+        importer.errors.insert(0, str(exc))
+        deleted = 0
+
+    if not dry_run and not importer.errors:
+        invalidate_answer_key(default_module.pk, *importer.touched_modules)
+        invalidate_course_catalogue(
+            default_module.course_id, *(importer.course_ids.get(m) for m in importer.touched_modules)
+        )
+
+    return {
+        "questions": importer.questions,
+        "choices": importer.choices,
+        "skipped": importer.skipped,
+        "deleted": deleted,
+        "errors": importer.errors[:MAX_REPORTED_ERRORS],
+        "dry_run": dry_run,
+    }
@@ -0,0 +1,200 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .assignments import group_member_ids, refresh_effective_assignments, refresh_for_assignment
+from .catalogue import (
+    invalidate_course_catalogue,
+    invalidate_course_slug,
+    invalidate_module_catalogue,
+    invalidate_progress_catalogue,
+)
+from .certificates import invalidate_certificate_verification
+from .compliance import invalidate_course_compliance, invalidate_group_compliance
+from .grading import invalidate_answer_key
+from .models import (
+    Certificate,
+    Choice,
+    Course,
+    CourseAssignment,
+    Lesson,
+    LessonProgress,
+    Module,
+    ModuleProgress,
+    Question,
+)
+from .progress import invalidate_course_unlock_maps, invalidate_module_unlock_map, rebuild_lesson_bitmaps
+
+
+@receiver([post_save, post_delete], sender=ModuleProgress)
+def module_progress_changed(sender, instance, **kwargs):
+    course_id = instance.module.course_id
+    invalidate_module_unlock_map(instance.user_id, course_id)
+    invalidate_course_compliance(course_id)
+    invalidate_progress_catalogue(instance.user_id, course_id)
+
+
+@receiver([post_save, post_delete], sender=LessonProgress)
+def lesson_progress_changed(sender, instance, **kwargs):
+    course_id = (
+        Lesson.objects.filter(pk=instance.lesson_id).values_list("module__course_id", flat=True).first()
+    )
+    if course_id:
+        invalidate_progress_catalogue(instance.user_id, course_id)
+
+
+@receiver(pre_save, sender=Course)
+def course_changing(sender, instance, **kwargs):
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = (
+            Course.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate_course_slug(instance.slug, getattr(instance, "_previous_slug", None))
+    invalidate_course_catalogue(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def module_changed(sender, instance, **kwargs):
+    invalidate_course_unlock_maps(instance.course_id)
+    invalidate_course_compliance(instance.course_id)
+    invalidate_course_catalogue(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    invalidate_module_catalogue(instance.module_id)
+
+
+@receiver(pre_save, sender=Lesson)
+def lesson_moving(sender, instance, **kwargs):
+    # Lesson bits are keyed by order, so remember where the lesson was
+    instance._previous_position = None
+    if instance.pk:
+        instance._previous_position = (
+            Lesson.objects.filter(pk=instance.pk).values_list("module_id", "order").first()
+        )
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_position", None)
+    if not created and previous == (instance.module_id, instance.order):
+        return
+    rebuild_lesson_bitmaps(instance.module)
+    if previous and previous[0] != instance.module_id:
+        old_module = Module.objects.filter(pk=previous[0]).first()
+        if old_module:
+            rebuild_lesson_bitmaps(old_module)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    # Its LessonProgress rows are already gone, so this drops its bit
+    module = Module.objects.filter(pk=instance.module_id).first()
+    if module:
+        rebuild_lesson_bitmaps(module)
+
+
+@receiver(pre_save, sender=Question)
+def question_moving(sender, instance, **kwargs):
+    # Remember the old module so both answer keys are refreshed on a move
+    instance._previous_module_id = None
+    if instance.pk:
+        instance._previous_module_id = (
+            Question.objects.filter(pk=instance.pk).values_list("module_id", flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    previous_module_id = getattr(instance, "_previous_module_id", None)
+    invalidate_answer_key(instance.module_id, previous_module_id)
+    # Question counts are part of the catalogue
+    invalidate_module_catalogue(instance.module_id, previous_module_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    module_id = (
+        Question.objects.filter(pk=instance.question_id).values_list("module_id", flat=True).first()
+    )
+    invalidate_answer_key(module_id)
+
+
+@receiver(pre_save, sender=CourseAssignment)
+def course_assignment_changing(sender, instance, **kwargs):
+    instance._previous_assignment = None
+    if instance.pk:
+        instance._previous_assignment = (
+            CourseAssignment.objects
+            .filter(pk=instance.pk)
+            .values_list("user_id", "group_id", "course_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=CourseAssignment)
+def course_assignment_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_assignment", None)
+    current = (instance.user_id, instance.group_id, instance.course_id)
+    if previous and previous != current:
+        refresh_for_assignment(*previous)
+        invalidate_course_compliance(previous[2])
+    refresh_for_assignment(*current)
+    invalidate_course_compliance(instance.course_id)
+
+
+@receiver(post_delete, sender=CourseAssignment)
+def course_assignment_deleted(sender, instance, **kwargs):
+    refresh_for_assignment(instance.user_id, instance.group_id, instance.course_id)
+    invalidate_course_compliance(instance.course_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        # pk_set is None on clear; remember which groups the user is leaving
+        instance._cleared_group_ids = list(instance.groups.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # instance is a Group; pk_set holds user ids (None on clear)
+        user_ids = group_member_ids(instance.pk) | set(pk_set or ())
+        invalidate_group_compliance(instance.pk)
+    else:
+        user_ids = [instance.pk]
+        invalidate_group_compliance(*(pk_set or getattr(instance, "_cleared_group_ids", ())))
+    refresh_effective_assignments(user_ids)
+
+
+@receiver(pre_save, sender=Certificate)
+def certificate_changing(sender, instance, **kwargs):
+    instance._previous_number = None
+    if instance.pk:
+        instance._previous_number = (
+            Certificate.objects.filter(pk=instance.pk).values_list("certificate_number", flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def certificate_changed(sender, instance, **kwargs):
+    invalidate_certificate_verification(
+        instance.certificate_number, getattr(instance, "_previous_number", None)
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def user_renamed(sender, instance, created, update_fields, **kwargs):
+    # The holder's name is part of each verification record. Logins only
+    # touch last_login, so they skip the lookup.
+    if created or (update_fields and not {"first_name", "last_name", "username"} & set(update_fields)):
+        return
+    invalidate_certificate_verification(
+        *Certificate.objects.filter(user=instance).values_list("certificate_number", flat=True)
+    )
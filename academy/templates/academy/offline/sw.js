@@ -0,0 +1,268 @@
+// Cozy Academy service worker – offline lessons.
+//
+// - Lesson pages listed in a module's precache manifest are cached and served
+//   from the cache (refreshed in the background); the manifest's per-lesson
+//   hashes decide which pages need downloading again.
+// - Module pages are network-first with the cached copy as the offline fallback.
+// - Lesson completions that fail because the device is offline are queued in
+//   IndexedDB and sent in one batch request once back online.
+//
+// Caches and the queue belong to one user; they are dropped on logout or
+// when another user precaches.
+
+const SCOPE = "{{ scope|escapejs }}";
+const COMPLETE_PREFIX = "{{ complete_prefix|escapejs }}";
+const COMPLETE_SUFFIX = "{{ complete_suffix|escapejs }}";
+const SYNC_URL = "{{ sync_url|escapejs }}";
+
+const CACHE_PREFIX = "academy-offline-";
+const DB_NAME = "academy-offline";
+const QUEUE_STORE = "completions";
+const META_STORE = "manifests";
+const SYNC_TAG = "academy-lesson-completions";
+
+self.addEventListener("install", () => self.skipWaiting());
+self.addEventListener("activate", (event) => event.waitUntil(self.clients.claim()));
+
+
+// ---------------------------------------------------------------------------
+// IndexedDB helpers
+// ---------------------------------------------------------------------------
+
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore(QUEUE_STORE, { keyPath: "key", autoIncrement: true });
+      request.result.createObjectStore(META_STORE, { keyPath: "module" });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+async function withStore(name, mode, fn) {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(name, mode);
+    const result = fn(tx.objectStore(name));
+    tx.oncomplete = () => resolve(result && "result" in result ? result.result : undefined);
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+
+// ---------------------------------------------------------------------------
+// Precache
+// ---------------------------------------------------------------------------
+
+function cacheNames(user) {
+  return { lessons: `${CACHE_PREFIX}${user}-lessons`, pages: `${CACHE_PREFIX}${user}-pages` };
+}
+
+async function currentCaches() {
+  const names = (await caches.keys()).filter((name) => name.startsWith(CACHE_PREFIX));
+  return {
+    lessons: names.find((name) => name.endsWith("-lessons")),
+    pages: names.find((name) => name.endsWith("-pages")),
+  };
+}
+
+async function clearAll() {
+  const names = (await caches.keys()).filter((name) => name.startsWith(CACHE_PREFIX));
+  await Promise.all(names.map((name) => caches.delete(name)));
+  await withStore(QUEUE_STORE, "readwrite", (store) => store.clear());
+  await withStore(META_STORE, "readwrite", (store) => store.clear());
+}
+
+function cacheable(response) {
+  // Redirects usually mean the session expired (login page); never cache those
+  return response.ok && !response.redirected && response.type === "basic";
+}
+
+async function precache(manifestUrl, user) {
+  const names = cacheNames(user);
+  const existing = (await caches.keys()).filter((name) => name.startsWith(CACHE_PREFIX));
+  if (existing.some((name) => !Object.values(names).includes(name))) {
+    // Another user's data is still here
+    await clearAll();
+  }
+
+  const response = await fetch(manifestUrl, { credentials: "same-origin" });
+  if (!response.ok) return;
+  const manifest = await response.json();
+
+  const previous = (await withStore(META_STORE, "readonly", (store) => store.get(manifest.module))) || {};
+  if (previous.version === manifest.version) return;
+  const previousHashes = previous.hashes || {};
+
+  const lessonCache = await caches.open(names.lessons);
+  const hashes = {};
+  for (const lesson of manifest.lessons) {
+    hashes[lesson.url] = lesson.hash;
+    if (previousHashes[lesson.url] === lesson.hash && (await lessonCache.match(lesson.url))) continue;
+    try {
+      const page = await fetch(lesson.url, { credentials: "same-origin" });
+      if (cacheable(page)) await lessonCache.put(lesson.url, page);
+    } catch (err) {
+      return; // offline again – try next time
+    }
+  }
+  // Lessons removed from the module
+  for (const url of Object.keys(previousHashes)) {
+    if (!(url in hashes)) await lessonCache.delete(url);
+  }
+
+  const pageCache = await caches.open(names.pages);
+  for (const url of manifest.pages) {
+    try {
+      const page = await fetch(url, { credentials: "same-origin" });
+      if (cacheable(page)) await pageCache.put(url, page);
+    } catch (err) {
+      // keep the previous copy
+    }
+  }
+
+  await withStore(META_STORE, "readwrite", (store) =>
+    store.put({ module: manifest.module, version: manifest.version, hashes })
+  );
+}
+
+
+// ---------------------------------------------------------------------------
+// Navigation
+// ---------------------------------------------------------------------------
+
+async function navigate(request, event) {
+  const { lessons, pages } = await currentCaches();
+
+  const cachedLesson = lessons && (await (await caches.open(lessons)).match(request.url));
+  if (cachedLesson) {
+    // Serve instantly, refresh the copy for next time
+    event.waitUntil(
+      fetch(request)
+        .then(async (response) => {
+          if (cacheable(response)) await (await caches.open(lessons)).put(request.url, response);
+        })
+        .catch(() => {})
+    );
+    return cachedLesson;
+  }
+
+  try {
+    const response = await fetch(request);
+    if (pages && cacheable(response)) {
+      const pageCache = await caches.open(pages);
+      if (await pageCache.match(request.url)) await pageCache.put(request.url, response.clone());
+    }
+    return response;
+  } catch (err) {
+    const cachedPage = pages && (await (await caches.open(pages)).match(request.url));
+    if (cachedPage) return cachedPage;
+    return new Response(
+      "<h1>You are offline</h1><p>This page has not been saved for offline use.</p>",
+      { status: 503, headers: { "Content-Type": "text/html; charset=utf-8" } }
+    );
+  }
+}
+
+
+// ---------------------------------------------------------------------------
+// Lesson completions
+// ---------------------------------------------------------------------------
+
+function completedLessonId(pathname) {
+  if (!pathname.startsWith(COMPLETE_PREFIX) || !pathname.endsWith(COMPLETE_SUFFIX)) return null;
+  const id = pathname.slice(COMPLETE_PREFIX.length, pathname.length - COMPLETE_SUFFIX.length);
+  return /^\d+$/.test(id) ? Number(id) : null;
+}
+
+async function csrfToken(request) {
+  const header = request.headers.get("X-CSRFToken");
+  if (header) return header;
+  try {
+    return (await request.clone().formData()).get("csrfmiddlewaretoken");
+  } catch (err) {
+    return null;
+  }
+}
+
+async function completeLesson(request, lessonId) {
+  const csrf = await csrfToken(request);
+  try {
+    return await fetch(request.clone());
+  } catch (err) {
+    await withStore(QUEUE_STORE, "readwrite", (store) =>
+      store.add({ lesson: lessonId, completed_at: new Date().toISOString(), csrf })
+    );
+    if (self.registration.sync) {
+      self.registration.sync.register(SYNC_TAG).catch(() => {});
+    }
+    if (request.mode === "navigate") {
+      return Response.redirect(request.referrer || SCOPE, 303);
+    }
+    return new Response(JSON.stringify({ queued: true }), {
+      status: 202,
+      headers: { "Content-Type": "application/json" },
+    });
+  }
+}
+
+async function flushQueue(currentCsrf) {
+  const items = (await withStore(QUEUE_STORE, "readonly", (store) => store.getAll())) || [];
+  if (!items.length) return;
+
+  // Prefer the page's current token; queued ones may be from an older session
+  const csrf = currentCsrf || items.map((item) => item.csrf).filter(Boolean).pop();
+  const response = await fetch(SYNC_URL, {
+    method: "POST",
+    credentials: "same-origin",
+    headers: { "Content-Type": "application/json", "X-CSRFToken": csrf || "" },
+    body: JSON.stringify({
+      lessons: items.map((item) => ({ id: item.lesson, completed_at: item.completed_at })),
+    }),
+  });
+  // A 400 batch can never succeed, so don't retry it forever
+  if (response.ok || response.status === 400) {
+    await withStore(QUEUE_STORE, "readwrite", (store) => {
+      items.forEach((item) => store.delete(item.key));
+    });
+  }
+}
+
+
+// ---------------------------------------------------------------------------
+// Events
+// ---------------------------------------------------------------------------
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin || !url.pathname.startsWith(SCOPE)) return;
+
+  if (request.method === "POST") {
+    const lessonId = completedLessonId(url.pathname);
+    if (lessonId !== null) event.respondWith(completeLesson(request, lessonId));
+    return;
+  }
+  if (request.method === "GET" && request.mode === "navigate") {
+    event.respondWith(navigate(request, event));
+  }
+});
+
+self.addEventListener("sync", (event) => {
+  if (event.tag === SYNC_TAG) event.waitUntil(flushQueue(null));
+});
+
+self.addEventListener("message", (event) => {
+  const data = event.data || {};
+  if (data.type === "precache") {
+    event.waitUntil(
+      precache(data.manifest, data.user).then(() => flushQueue(data.csrf)).catch(() => {})
+    );
+  } else if (data.type === "sync") {
+    event.waitUntil(flushQueue(data.csrf).catch(() => {}));
+  } else if (data.type === "clear") {
+    event.waitUntil(clearAll());
+  }
+});
@@ -34,6 +34,35 @@ urlpatterns = [
         name="academy_complete_lesson",
     ),
 
+    # Offline lessons (service worker)
+    path(
+        "sw.js",
+        views.academy_service_worker,
+        name="academy_service_worker",
+    ),
+    path(
+        "course/<slug:course_slug>/module/<slug:module_slug>/offline-manifest/",
+        views.module_offline_manifest,
+        name="academy_module_offline_manifest",
+    ),
+    path(
+        "lessons/complete/",
+        views.academy_complete_lessons_batch,
+        name="academy_complete_lessons_batch",
+    ),
+
+    # Driver app API (read-only)
+    path(
+        "api/v1/courses/",
+        views.api_course_catalogue,
+        name="academy_api_courses",
+    ),
+    path(
+        "api/v1/courses/<slug:course_slug>/",
+        views.api_course,
+        name="academy_api_course",
+    ),
+
     path(
         "course/<slug:course_slug>/module/<slug:module_slug>/quiz/",
         views.module_quiz,
@@ -81,6 +110,31 @@ urlpatterns = [
         views.manager_certificates,
         name="academy_manager_certificates",
     ),
+    path(
+        "managers/certificates/export/",
+        views.manager_export_certificates,
+        name="academy_manager_export_certificates",
+    ),
+    path(
+        "certificate/<int:certificate_id>/",
+        views.certificate_detail,
+        name="academy_certificate_detail",
+    ),
+    path(
+        "verify/",
+        views.verify_certificate_lookup,
+        name="academy_verify_certificate_lookup",
+    ),
+    path(
+        "verify/<str:certificate_number>/",
+        views.verify_certificate,
+        name="academy_verify_certificate",
+    ),
+    path(
+        "verify/<str:certificate_number>/json/",
+        views.verify_certificate_json,
+        name="academy_verify_certificate_json",
+    ),
     path(
         "managers/certificate/<int:certificate_id>/pdf/",
         views.generate_certificate_pdf,
@@ -190,6 +244,27 @@ urlpatterns = [
     path("manager/questions/<int:question_id>/choices/add/", views.add_choice, name="academy_add_choice"),
     path("managers/questions/", views.manage_questions, name="academy_manage_questions"),
     path("managers/questions/import/", views.import_questions, name="academy_import_questions"),
+    path("managers/questions/export/", views.export_questions, name="academy_export_questions"),
+    path(
+        "managers/compliance/",
+        views.manager_compliance,
+        name="academy_manager_compliance",
+    ),
+    path(
+        "managers/users/import/",
+        views.manager_users_import,
+        name="academy_manager_users_import",
+    ),
+    path(
+        "managers/export/",
+        views.manager_export_training_records,
+        name="academy_manager_export",
+    ),
+    path(
+        "managers/question-stats/",
+        views.manager_question_stats,
+        name="academy_manager_question_stats",
+    ),
     path(
         "managers/assign/",
         views.manager_assign,
@@ -4,13 +4,15 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import mail_admins, send_mail
+from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.contrib.auth.decorators import user_passes_test
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from .models import ManagerDocument
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from .models import Certificate, ModuleProgress, FinalTestSubmission
 from django.conf import settings
 from reportlab.lib.utils import ImageReader
@@ -18,10 +20,63 @@ from .forms import QuestionForm, ChoiceFormSet
 import json
 from django.contrib.admin.views.decorators import staff_member_required
 from .models import Question, Choice, Module
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_POST
+from django.utils.text import slugify
 from .models import Course, CourseAssignment
 import os
 
+from .analytics import question_stats_rows, record_attempt
+from .catalogue import (
+    CATALOGUE_API_VERSION,
+    catalogue_course_id,
+    catalogue_etag,
+    catalogue_index,
+    catalogue_index_etag,
+    course_tree,
+    user_course_progress,
+)
+from .certificates import (
+    certificate_batch,
+    get_certificate_pdf,
+    stream_certificates_zip,
+    verification_record,
+)
+from .compliance import compliance_summary, group_course_pairs, non_compliant_drivers
+from .exports import EXPORT_KINDS, stream_csv, stream_xlsx
+from .offline import CompletionBatchError, module_manifest, parse_completion_batch
+from .onboarding import (
+    ONBOARDING_COLUMNS,
+    OnboardingError,
+    onboard_users,
+    parse_onboarding_csv,
+    send_invites,
+    validate_onboarding_rows,
+)
+from .question_export import (
+    EXPORT_FORMATS as QUESTION_EXPORT_FORMATS,
+    export_queryset,
+    stream_questions_json,
+)
+from .question_import import QuestionImportError, import_questions as run_question_import
+from .grading import (
+    claim_draw,
+    draw_items,
+    draw_questions,
+    get_answer_key,
+    grade_submission,
+    store_draw,
+    uses_pool,
+)
+from .progress import (
+    build_module_unlock_map,
+    driver_progress_matrix,
+    lesson_bitmap_layout,
+    set_lesson_bit,
+)
 
 from .models import (
     Course,
@@ -33,6 +88,8 @@ from .models import (
     Choice,
     FinalTestSubmission,
     Certificate,
+    QuizAttempt,
+    EffectiveCourseAssignment,
 )
 
 
@@ -41,7 +98,8 @@ def _update_module_progress_from_lessons(user, module):
     Recalculate ModuleProgress for a user/module based on lesson completion.
 
     For now:
-      - score = percentage of lessons completed (0–100)
+      - score = percentage of lessons completed (0–100), read from
+        ModuleProgress.lesson_bitmap (LessonProgress count as a fallback)
       - status:
           0%      -> not_started
           1–99%   -> in_progress
@@ -49,8 +107,8 @@ def _update_module_progress_from_lessons(user, module):
     """
     module_progress = _get_module_progress(user, module)
 
-    lessons = module.lessons.all()
-    total = lessons.count()
+    lessons = list(module.lessons.all())
+    total = len(lessons)
 
     if total == 0:
         # No lessons: treat as completed module
@@ -59,11 +117,16 @@ def _update_module_progress_from_lessons(user, module):
         if module_progress.completed_at is None:
             module_progress.completed_at = timezone.now()
     else:
-        completed_count = LessonProgress.objects.filter(
-            user=user,
-            lesson__module=module,
-            completed=True,
-        ).count()
+        layout = lesson_bitmap_layout(lessons)
+        if layout is not None:
+            mask = sum(layout.values())
+            completed_count = (module_progress.lesson_bitmap & mask).bit_count()
+        else:
+            completed_count = LessonProgress.objects.filter(
+                user=user,
+                lesson__module=module,
+                completed=True,
+            ).count()
 
         percent = int((completed_count / total) * 100)
 
@@ -81,7 +144,7 @@ def _update_module_progress_from_lessons(user, module):
                 module_progress.completed_at = timezone.now()
 
     module_progress.last_attempt_at = timezone.now()
-    module_progress.save()
+    module_progress.save(update_fields=ModuleProgress.PROGRESS_FIELDS)
     return module_progress
 
 
@@ -89,17 +152,10 @@ def _can_access_module(user, module):
     """
     Returns True if the user has passed all previous mandatory modules in this course.
     'Passed' means ModuleProgress.score >= module.min_score_to_pass.
+    Looked up in the cached per-course unlock map (see academy/progress.py).
     """
-    previous_modules = module.course.modules.filter(
-        order__lt=module.order,
-        is_mandatory=True,
-    )
-
-    for m in previous_modules:
-        prog = ModuleProgress.objects.filter(user=user, module=m).first()
-        if not prog or not prog.passed:
-            return False
-    return True
+    unlock_map = build_module_unlock_map(user, module.course)
+    return unlock_map.get(module.pk, False)
 
 
 def _get_module_progress(user, module):
@@ -144,6 +200,10 @@ def _issue_certificate_if_needed(request, module_progress):
         reverse("academy_certificate_detail", args=[certificate.id])
     )
 
+    verify_url = request.build_absolute_uri(
+        reverse("academy_verify_certificate", args=[certificate.certificate_number])
+    )
+
     # Email all admins (uses settings.ADMINS)
     subject = (
         f"New Driver Induction certificate – "
@@ -154,7 +214,8 @@ def _issue_certificate_if_needed(request, module_progress):
         f"'{course.title}' – module '{module.title}' with a score of "
         f"{module_progress.score}%.\n\n"
         f"Certificate number: {certificate.certificate_number}\n"
-        f"View/print the certificate here: {url}"
+        f"View/print the certificate here: {url}\n"
+        f"Public verification page: {verify_url}"
     )
 
     mail_admins(subject, message)
@@ -169,33 +230,35 @@ def dashboard(request):
     """
 
     # 1. Get course IDs assigned to this user OR their groups
-    assigned_course_ids = CourseAssignment.objects.filter(
-        Q(user=request.user) |
-        Q(group__in=request.user.groups.all())
+    #    (materialised in EffectiveCourseAssignment, see academy/assignments.py)
+    assigned_course_ids = EffectiveCourseAssignment.objects.filter(
+        user=request.user
     ).values_list("course_id", flat=True)
 
-    # 2. Load the assigned courses, still respecting is_active
+    # 2. Load the assigned courses, still respecting is_active.
+    #    Module totals and the user's passed modules are counted in the same
+    #    query (passed = score >= module.min_score_to_pass).
     courses = Course.objects.filter(
         id__in=assigned_course_ids,
         is_active=True
-    ).prefetch_related("modules").order_by("order")
+    ).annotate(
+        module_total=Count("modules", distinct=True),
+        module_passed=Count(
+            "modules__moduleprogress",
+            filter=Q(
+                modules__moduleprogress__user=request.user,
+                modules__moduleprogress__score__gte=F("modules__min_score_to_pass"),
+            ),
+            distinct=True,
+        ),
+    ).order_by("order")
 
     course_data = []
 
-    # 3. Progress calculation remains EXACTLY the same
+    # 3. Progress calculation (no per-module queries)
     for course in courses:
-        modules = course.modules.all()
-        total_modules = modules.count() or 1
-        completed_modules = 0
-
-        for module in modules:
-            mp = ModuleProgress.objects.filter(
-                user=request.user,
-                module=module
-            ).first()
-
-            if mp and mp.passed:
-                completed_modules += 1
+        total_modules = course.module_total or 1
+        completed_modules = course.module_passed
 
         progress_percent = int((completed_modules / total_modules) * 100)
 
@@ -219,19 +282,23 @@ def course_detail(request, course_slug):
     course = get_object_or_404(Course, slug=course_slug, is_active=True)
     modules = course.modules.all()
 
+    progress_by_module = {
+        mp.module_id: mp
+        for mp in (
+            ModuleProgress.objects
+            .filter(user=request.user, module__course=course)
+            .select_related("module")
+        )
+    }
+    unlock_map = build_module_unlock_map(request.user, course)
+
     module_rows = []
     for module in modules:
-        module_progress = ModuleProgress.objects.filter(
-            user=request.user,
-            module=module,
-        ).first()
-        can_access = _can_access_module(request.user, module)
-
         module_rows.append(
             {
                 "module": module,
-                "progress": module_progress,
-                "can_access": can_access,
+                "progress": progress_by_module.get(module.id),
+                "can_access": unlock_map.get(module.id, False),
             }
         )
 
@@ -255,33 +322,41 @@ def module_detail(request, course_slug, module_slug):
         messages.warning(request, "Please complete the previous modules first.")
         return redirect("academy_course_detail", course_slug=course.slug)
 
-    # Get or create module progress record
-    module_progress = _get_module_progress(request.user, module)
+    # Read-only: progress is recalculated when a lesson is completed or a
+    # quiz is submitted, never on page views.
+    module_progress = (
+        ModuleProgress.objects
+        .filter(user=request.user, module=module)
+        .select_related("module")
+        .first()
+    )
 
-    lessons = module.lessons.all()
+    lessons = list(module.lessons.defer("content"))
+    layout = lesson_bitmap_layout(lessons)
 
-    lesson_rows = []
-    for lesson in lessons:
-        lp = LessonProgress.objects.filter(user=request.user, lesson=lesson).first()
-        lesson_rows.append(
-            {
-                "lesson": lesson,
-                "progress": lp,
-            }
+    if layout is not None:
+        bitmap = module_progress.lesson_bitmap if module_progress else 0
+        completed_ids = {pk for pk, bit in layout.items() if bitmap & bit}
+    else:
+        completed_ids = set(
+            LessonProgress.objects
+            .filter(user=request.user, lesson__module=module, completed=True)
+            .values_list("lesson_id", flat=True)
         )
 
+    lesson_rows = [
+        {
+            "lesson": lesson,
+            "completed": lesson.id in completed_ids,
+        }
+        for lesson in lessons
+    ]
+
     # Calculate % of lessons completed for display
-    total_lessons = lessons.count() or 1
-    completed_lessons = sum(
-        1
-        for row in lesson_rows
-        if row["progress"] and row["progress"].completed
-    )
+    total_lessons = len(lessons) or 1
+    completed_lessons = len(completed_ids)
     lesson_progress_percent = int((completed_lessons / total_lessons) * 100)
 
-    # Update module_progress (score + status) based on lessons
-    module_progress = _update_module_progress_from_lessons(request.user, module)
-
     context = {
         "course": course,
         "module": module,
@@ -308,8 +383,8 @@ def module_quiz(request, course_slug, module_slug):
         messages.warning(request, "Please complete the previous modules first.")
         return redirect("academy_course_detail", course_slug=course.slug)
 
-    questions = module.questions.prefetch_related("choices").all()
-    if not questions.exists():
+    answer_key = get_answer_key(module)
+    if not answer_key:
         messages.warning(request, "No questions have been set up for this module yet.")
         return redirect(
             "academy_module_detail",
@@ -317,13 +392,14 @@ def module_quiz(request, course_slug, module_slug):
             module_slug=module.slug,
         )
 
-    module_progress = _get_module_progress(request.user, module)
-
     if request.method == "GET":
+        draw = draw_questions(module, answer_key)
+        module_progress = ModuleProgress.objects.filter(user=request.user, module=module).first()
         context = {
             "course": course,
             "module": module,
-            "questions": questions,
+            "questions": draw_items(answer_key, draw),
+            "draw_token": store_draw(request.user, module, draw),
             "module_progress": module_progress,
             "score_percent": None,
             "passed": False,
@@ -331,55 +407,52 @@ def module_quiz(request, course_slug, module_slug):
         }
         return render(request, "academy/module_quiz.html", context)
 
-    # POST – mark answers
-    total_questions = questions.count()
-    correct_count = 0
-    answers_marked = []
+    # POST – grade the questions that were drawn for this attempt. The draw is
+    # claimed in the same transaction as the results, so it is graded once.
+    with transaction.atomic():
+        draw = claim_draw(request.user, module, request.POST.get("draw_token"))
+        if draw is None:
+            if uses_pool(module):
+                messages.warning(request, "This quiz attempt has expired. Please try again.")
+                return redirect("academy_module_quiz", course_slug=course.slug, module_slug=module.slug)
+            draw = draw_questions(module, answer_key)
 
-    for question in questions:
-        field_name = f"question_{question.id}"
-        choice_id = request.POST.get(field_name)
-        selected_choice = None
-        is_correct = False
+        module_progress = _get_module_progress(request.user, module)
+        grade = grade_submission(answer_key, request.POST, question_ids=draw["question_ids"])
+        score_percent = grade["score_percent"]
+
+        # Update ModuleProgress (keep best score)
+        if score_percent > module_progress.score:
+            module_progress.score = score_percent
 
-        if choice_id:
-            try:
-                selected_choice = Choice.objects.get(id=choice_id, question=question)
-                is_correct = selected_choice.is_correct
-            except Choice.DoesNotExist:
-                selected_choice = None
+        module_progress.last_attempt_at = timezone.now()
+
+        if module_progress.score >= module.min_score_to_pass:
+            module_progress.status = "completed"
+            if module_progress.completed_at is None:
+                module_progress.completed_at = timezone.now()
+            passed = True
+        else:
+            if module_progress.status == "not_started":
+                module_progress.status = "in_progress"
+            passed = False
 
-        if is_correct:
-            correct_count += 1
+        module_progress.save(update_fields=ModuleProgress.PROGRESS_FIELDS)
+        record_attempt(request.user, module, QuizAttempt.KIND_QUIZ, grade["results"])
 
+    questions = draw_items(answer_key, draw)
+    marked_by_question = {r["question_id"]: r for r in grade["results"]}
+    answers_marked = []
+    for question in questions:
+        result = marked_by_question.get(question["id"], {})
         answers_marked.append(
             {
                 "question": question,
-                "selected_choice": selected_choice,
-                "is_correct": is_correct,
+                "selected_choice_id": result.get("selected_choice_id"),
+                "is_correct": result.get("is_correct", False),
             }
         )
 
-    score_percent = int((correct_count / total_questions) * 100)
-
-    # Update ModuleProgress (keep best score)
-    if score_percent > module_progress.score:
-        module_progress.score = score_percent
-
-    module_progress.last_attempt_at = timezone.now()
-
-    if module_progress.score >= module.min_score_to_pass:
-        module_progress.status = "completed"
-        if module_progress.completed_at is None:
-            module_progress.completed_at = timezone.now()
-        passed = True
-    else:
-        if module_progress.status == "not_started":
-            module_progress.status = "in_progress"
-        passed = False
-
-    module_progress.save()
-
     # If this is the final assessment module and they passed, issue certificate
     # Adjust slug string to whatever you used in admin
     if passed and module.slug == "new-driver-induction-final-assessment":
@@ -389,6 +462,8 @@ def module_quiz(request, course_slug, module_slug):
         "course": course,
         "module": module,
         "questions": questions,
+        # The results page lets the driver retry the same questions on a new token
+        "draw_token": store_draw(request.user, module, draw),
         "module_progress": module_progress,
         "answers_marked": answers_marked,
         "score_percent": score_percent,
@@ -397,25 +472,48 @@ def module_quiz(request, course_slug, module_slug):
     return render(request, "academy/module_quiz.html", context)
 
 
-@login_required
-def academy_complete_lesson(request, lesson_id):
-    lesson = get_object_or_404(Lesson, id=lesson_id)
+def _complete_lessons(user, lessons, completed_at=None):
+    """
+    Mark lessons complete for a user, then update each affected module once.
+    'completed_at' optionally maps lesson id -> completion time (offline sync).
+    """
+    completed_at = completed_at or {}
+    now = timezone.now()
 
-    # Get or create progress record
-    progress, created = LessonProgress.objects.get_or_create(
-        user=request.user,
-        lesson=lesson,
-    )
+    # Progress rows are kept as the audit trail
+    existing = {
+        progress.lesson_id: progress
+        for progress in LessonProgress.objects.filter(user=user, lesson__in=lessons)
+    }
+    created, updated = [], []
+    for lesson in lessons:
+        when = completed_at.get(lesson.pk, now)
+        progress = existing.get(lesson.pk)
+        if progress is None:
+            created.append(LessonProgress(user=user, lesson=lesson, completed=True, completed_at=when))
+        elif not progress.completed or progress.completed_at is None:
+            progress.completed = True
+            progress.completed_at = progress.completed_at or when
+            updated.append(progress)
+    LessonProgress.objects.bulk_create(created)
+    LessonProgress.objects.bulk_update(updated, ["completed", "completed_at"])
+
+    # Set the lessons' bits, then update module progress from the bitmap
+    by_module = {}
+    for lesson in lessons:
+        by_module.setdefault(lesson.module_id, (lesson.module, []))[1].append(lesson)
+    for module, module_lessons in by_module.values():
+        module_progress = _get_module_progress(user, module)
+        for lesson in module_lessons:
+            set_lesson_bit(module_progress, lesson)
+        _update_module_progress_from_lessons(user, module)
 
-    # Mark as complete
-    progress.completed = True
-    if progress.completed_at is None:
-        progress.completed_at = timezone.now()
-    progress.save()
 
-    # Update module progress now that this lesson is complete
+@login_required
+def academy_complete_lesson(request, lesson_id):
+    lesson = get_object_or_404(Lesson.objects.select_related("module__course"), id=lesson_id)
+    _complete_lessons(request.user, [lesson])
     module = lesson.module
-    _update_module_progress_from_lessons(request.user, module)
 
     # Always go back to the module page after completion
     return redirect(
@@ -425,10 +523,124 @@ def academy_complete_lesson(request, lesson_id):
     )
 
 
+@login_required
+@require_POST
+def academy_complete_lessons_batch(request):
+    """
+    Completions queued by the service worker while offline, sent as one
+    JSON request. Unknown (e.g. deleted) lessons are reported, not fatal,
+    so the worker can drop them from its queue.
+    """
+    try:
+        completions = parse_completion_batch(json.loads(request.body or b"{}"))
+    except (ValueError, CompletionBatchError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    lessons = list(Lesson.objects.select_related("module__course").filter(pk__in=completions))
+    _complete_lessons(request.user, lessons, completed_at=completions)
+
+    found = {lesson.pk for lesson in lessons}
+    return JsonResponse({
+        "completed": sorted(found),
+        "unknown": sorted(set(completions) - found),
+    })
+
+
+@login_required
+def module_offline_manifest(request, course_slug, module_slug):
+    """
+    Precache manifest for the service worker (see academy/offline.py).
+    """
+    course = get_object_or_404(Course, slug=course_slug, is_active=True)
+    module = get_object_or_404(course.modules, slug=module_slug)
+    if not _can_access_module(request.user, module):
+        return JsonResponse({"error": "Module not available yet."}, status=403)
+
+    manifest = module_manifest(course, module)
+    manifest["sync_url"] = reverse("academy_complete_lessons_batch")
+
+    etag = f'"{manifest["version"]}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse(manifest)
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def academy_service_worker(request):
+    """
+    The service worker script. Served from the academy root rather than
+    /static/ so that its scope covers every academy page.
+    """
+    complete_prefix, complete_suffix = reverse("academy_complete_lesson", args=[0]).split("/0/")
+    response = render(
+        request,
+        "academy/offline/sw.js",
+        {
+            "scope": reverse("academy_dashboard"),
+            "complete_prefix": complete_prefix + "/",
+            "complete_suffix": "/" + complete_suffix,
+            "sync_url": reverse("academy_complete_lessons_batch"),
+        },
+        content_type="application/javascript",
+    )
+    # Browsers check for a new worker on navigation; never serve a stale one
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+CATALOGUE_CACHE_CONTROL = "private, no-cache"
+
+
+@login_required
+def api_course_catalogue(request):
+    """
+    Driver app: assigned courses with their content versions.
+    """
+    courses = catalogue_index(request.user)
+    etag = catalogue_index_etag(courses)
+
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse({"api_version": CATALOGUE_API_VERSION, "courses": courses})
+    response["ETag"] = etag
+    response["Cache-Control"] = CATALOGUE_CACHE_CONTROL
+    return response
+
+
+@login_required
+def api_course(request, course_slug):
+    """
+    Driver app: a whole course tree plus the user's progress in it. Both are
+    versioned in the cache, so an unchanged course answers 304 without
+    queries beyond the session and user lookups.
+    """
+    course_id = catalogue_course_id(course_slug)
+    if course_id is None:
+        return JsonResponse({"error": "Course not found."}, status=404)
+
+    etag = catalogue_etag(course_id, request.user.pk)
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse({
+            "api_version": CATALOGUE_API_VERSION,
+            "course": course_tree(course_id),
+            "progress": user_course_progress(request.user, course_id),
+        })
+    response["ETag"] = etag
+    response["Cache-Control"] = CATALOGUE_CACHE_CONTROL
+    return response
+
+
 @login_required
 def lesson_detail(request, course_slug, module_slug, lesson_id):
     lesson = get_object_or_404(
-        Lesson,
+        # The page shows the pre-rendered HTML, not the source
+        Lesson.objects.select_related("module__course").defer("content"),
         id=lesson_id,
         module__slug=module_slug,
         module__course__slug=course_slug,
@@ -437,10 +649,8 @@ def lesson_detail(request, course_slug, module_slug, lesson_id):
     course = lesson.module.course
     module = lesson.module
 
-    lesson_progress, _ = LessonProgress.objects.get_or_create(
-        user=request.user,
-        lesson=lesson,
-    )
+    # Read-only: the row is only created when the lesson is completed
+    lesson_progress = LessonProgress.objects.filter(user=request.user, lesson=lesson).first()
 
     context = {
         "course": course,
@@ -477,9 +687,9 @@ def final_test(request, course_slug, module_slug):
         messages.warning(request, "Please complete the previous modules first.")
         return redirect("academy_course_detail", course_slug=course.slug)
 
-    questions = module.questions.prefetch_related("choices").all()
+    answer_key = get_answer_key(module)
 
-    if not questions:
+    if not answer_key:
         messages.error(request, "Final test questions have not been set up yet.")
         return redirect(
             "academy_module_detail",
@@ -488,55 +698,47 @@ def final_test(request, course_slug, module_slug):
         )
 
     if request.method == "POST":
-        answers = []
-        total_questions = questions.count()
-        correct_count = 0
-
-        for q in questions:
-            field_name = f"question_{q.id}"
-            selected_choice_id = request.POST.get(field_name)
-            selected_choice = None
-            selected_choice_text = None
-
-            if selected_choice_id:
-                selected_choice = q.choices.filter(id=selected_choice_id).first()
-                if selected_choice:
-                    selected_choice_text = selected_choice.text
-
-            # Find the correct choice for this question
-            correct_choice = q.choices.filter(is_correct=True).first()
-            correct_choice_text = correct_choice.text if correct_choice else None
-
-            # Mark correctness
-            is_correct = (
-                selected_choice is not None
-                and correct_choice is not None
-                and selected_choice.id == correct_choice.id
-            )
-            if is_correct:
-                correct_count += 1
-
-            answers.append(
-                {
-                    "question_id": q.id,
-                    "question_text": q.text,
-                    "selected_choice_id": selected_choice.id if selected_choice else None,
-                    "selected_choice_text": selected_choice_text,
-                    "correct_choice_text": correct_choice_text,
-                    "is_correct": is_correct,
-                    "explanation": q.explanation,
-                }
-            )
-
-        # Save submission (now with marked answers + explanations)
-        submission = FinalTestSubmission.objects.create(
-            user=request.user,
-            module=module,
-            answers=answers,
-        )
+        with transaction.atomic():
+            draw = claim_draw(request.user, module, request.POST.get("draw_token"))
+            if draw is None:
+                if uses_pool(module):
+                    messages.warning(request, "This test attempt has expired. Please start again.")
+                    return redirect("academy_final_test", course_slug=course.slug, module_slug=module.slug)
+                draw = draw_questions(module, answer_key)
+
+            # Mark in memory against the cached answer key (no per-question queries)
+            grade = grade_submission(answer_key, request.POST, question_ids=draw["question_ids"])
+            total_questions = grade["total_questions"]
+            correct_count = grade["correct_count"]
+            score_percent = grade["score_percent"]
+
+            answers = []
+            for result in grade["results"]:
+                entry = answer_key[result["question_id"]]
+                selected_id = result["selected_choice_id"]
+                correct_id = next((pk for pk in entry["choices"] if pk in entry["correct"]), None)
+                answers.append(
+                    {
+                        "question_id": result["question_id"],
+                        "question_text": entry["text"],
+                        "selected_choice_id": selected_id,
+                        "selected_choice_text": entry["choices"][selected_id] if selected_id else None,
+                        "correct_choice_text": entry["choices"][correct_id] if correct_id else None,
+                        "is_correct": result["is_correct"],
+                        "explanation": entry["explanation"],
+                    }
+                )
 
-        # Calculate score as a percentage
-        score_percent = int((correct_count / total_questions) * 100) if total_questions > 0 else 0
+            # Save submission (marked answers + summary columns)
+            submission = FinalTestSubmission.objects.create(
+                user=request.user,
+                module=module,
+                answers=answers,
+                score_percent=score_percent,
+                correct_count=correct_count,
+                total_questions=total_questions,
+            )
+            record_attempt(request.user, module, QuizAttempt.KIND_FINAL, answers)
 
         # Email all superusers
         User = get_user_model()
@@ -604,11 +806,13 @@ def final_test(request, course_slug, module_slug):
             module_slug=module.slug,
         )
 
-    # GET – show test form
+    # GET – show test form for a fresh draw
+    draw = draw_questions(module, answer_key)
     context = {
         "course": course,
         "module": module,
-        "questions": questions,
+        "questions": draw_items(answer_key, draw),
+        "draw_token": store_draw(request.user, module, draw),
     }
     return render(request, "academy/final_test.html", context)
 
@@ -652,116 +856,153 @@ def manager_tools(request):
 @user_passes_test(lambda u: u.is_superuser or Certificate.objects.filter(user=u).exists())
 def generate_certificate_pdf(request, certificate_id):
     """
-    Generate a stylish landscape certificate PDF with Cozy branding.
+    Stylish landscape certificate PDF with Cozy branding. Rendered once per
+    content version and served from cache afterwards (see academy/certificates.py).
     """
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.utils import ImageReader
-    from reportlab.pdfgen import canvas
-    from django.templatetags.static import static
-
-    certificate = get_object_or_404(Certificate, id=certificate_id)
-    user = certificate.user
-    course = certificate.course
-    module = certificate.module
+    certificate = get_object_or_404(
+        Certificate.objects.select_related("user", "course", "module"),
+        id=certificate_id,
+    )
 
     # Only owner or superuser can access
-    if not (request.user.is_superuser or request.user == user):
+    if not (request.user.is_superuser or request.user == certificate.user):
         return HttpResponseForbidden("You do not have permission to view this certificate.")
 
-    # Landscape page setup
-    page_width, page_height = landscape(A4)
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'inline; filename="Cozy_Certificate_{certificate.id}.pdf"'
-
-    # Initialize canvas
-    p = canvas.Canvas(response, pagesize=landscape(A4))
-    margin = 50
-
-    # Colors
-    burgundy = colors.HexColor("#800020")
-    gray = colors.HexColor("#444444")
-
-    # Background border
-    p.setStrokeColor(burgundy)
-    p.setLineWidth(4)
-    p.rect(margin / 2, margin / 2, page_width - margin, page_height - margin, stroke=1, fill=0)
-
-    # Logo (top-left)
-    logo_path = os.path.join(settings.BASE_DIR, "static", "media", "LOGO-Cozys.webp")
-    logo = ImageReader(logo_path)
-    p.drawImage(
-        logo,
-        x=margin,
-        y=page_height - 130,
-        width=180,
-        height=80,
-        mask="auto",
-        preserveAspectRatio=True,
-    )
+    pdf, content_hash = get_certificate_pdf(certificate)
+    etag = f'"{content_hash}"'
+
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(pdf, content_type="application/pdf")
+        response["Content-Disposition"] = f'inline; filename="Cozy_Certificate_{certificate.id}.pdf"'
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
 
-        # Title
-    p.setFont("Helvetica-Bold", 32)
-    p.setFillColor(burgundy)
-    p.drawCentredString(page_width / 2, page_height - 200, "Certificate of Completion")
-
-    # Subtitle line
-    p.setStrokeColor(gray)
-    p.line(page_width / 4, page_height - 210, page_width * 3 / 4, page_height - 210)
-
-    # Recipient
-    p.setFillColor(gray)
-    p.setFont("Helvetica", 16)
-    p.drawCentredString(page_width / 2, page_height - 270, "This certifies that")
-
-    p.setFont("Helvetica-Bold", 26)
-    p.setFillColor(burgundy)
-    name_text = user.get_full_name() or user.username
-    p.drawCentredString(page_width / 2, page_height - 305, name_text)
-
-    p.setFillColor(gray)
-    p.setFont("Helvetica", 15)
-    p.drawCentredString(page_width / 2, page_height - 335, "has successfully completed")
-
-    # Course + module info
-    p.setFont("Helvetica-Bold", 20)
-    p.setFillColor(burgundy)
-    p.drawCentredString(page_width / 2, page_height - 370, course.title)
-
-    p.setFont("Helvetica", 13)
-    p.setFillColor(gray)
-    p.drawCentredString(page_width / 2, page_height - 395, f"Module: {module.title}")
-    p.drawCentredString(page_width / 2, page_height - 415, f"Score Achieved: {certificate.score}%")
-
-    # Issue details
-    p.setFont("Helvetica-Oblique", 11)
-    p.setFillColor(gray)
-    p.drawCentredString(page_width / 2, margin + 80, f"Issued on {certificate.issued_at.strftime('%d %B %Y')}")
-    p.drawCentredString(page_width / 2, margin + 60, f"Certificate No: {certificate.certificate_number}")
-
-    # Footer
-    p.setFont("Helvetica", 10)
-    p.setFillColor(burgundy)
-    p.drawCentredString(page_width / 2, margin + 35, "Cozy Travel – Driver Academy")
-    p.setFillColor(gray)
-    p.drawCentredString(page_width / 2, margin + 20, "© Cozy Travel Ltd. All rights reserved")
-
-    # Save and return
-    p.showPage()
-    p.save()
+
+VERIFIED_CACHE_CONTROL = "public, max-age=86400"
+NOT_FOUND_CACHE_CONTROL = "public, max-age=300"
+
+
+def _verification_response(request, record, build):
+    """
+    Shared conditional-GET / cache-header handling for the verification
+    page and its JSON twin. 'build' renders the full response.
+    """
+    if record is None:
+        response = build(status=404)
+        response["Cache-Control"] = NOT_FOUND_CACHE_CONTROL
+        return response
+
+    etag = f'"{record["etag"]}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = build(status=200)
+    response["ETag"] = etag
+    response["Cache-Control"] = VERIFIED_CACHE_CONTROL
     return response
 
 
+def verify_certificate_lookup(request):
+    """
+    Public form: enter a certificate number to check it.
+    """
+    number = (request.GET.get("number") or "").strip()
+    if number and "/" not in number:
+        return redirect("academy_verify_certificate", certificate_number=number)
+    return render(request, "academy/verify_certificate.html", {"lookup": True})
+
+
+def verify_certificate(request, certificate_number):
+    """
+    Public verification page linked from the QR code on each certificate.
+    """
+    record = verification_record(certificate_number)
+    return _verification_response(request, record, lambda status: render(
+        request,
+        "academy/verify_certificate.html",
+        {"record": record, "certificate_number": certificate_number},
+        status=status,
+    ))
+
+
+def verify_certificate_json(request, certificate_number):
+    record = verification_record(certificate_number)
+
+    def build(status):
+        if record is None:
+            return JsonResponse({"valid": False, "certificate_number": certificate_number}, status=status)
+        payload = {k: v for k, v in record.items() if k != "etag"}
+        return JsonResponse({"valid": True, **payload}, status=status)
+
+    return _verification_response(request, record, build)
 
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def manager_certificates(request):
     """View for superusers to manage and review certificates"""
+    return _certificates_page(request)
+
+
+def _certificates_page(request, export=None, status=200):
     certificates = Certificate.objects.all().order_by("-issued_at")
     return render(request, "academy/manager/certificates.html", {
         "certificates": certificates,
-    })
+        "courses": Course.objects.order_by("order", "title"),
+        "export": export or {},
+    }, status=status)
+
+
+@superuser_required
+def manager_export_certificates(request):
+    """
+    Every certificate for a course and/or issue date range as one ZIP of
+    PDFs. Uncached certificates are rendered in a process pool and each PDF
+    is streamed into the archive as soon as it is ready.
+    """
+    course = None
+    course_id = request.GET.get("course")
+    if course_id and course_id.isdigit():
+        course = get_object_or_404(Course, pk=course_id)
+
+    raw_dates = {field: (request.GET.get(field) or "").strip() for field in ("from", "to")}
+    dates, errors = {}, {}
+    for field, raw in raw_dates.items():
+        try:
+            dates[field] = parse_date(raw) if raw else None
+        except ValueError:
+            # Well-formed but impossible, e.g. 2026-02-30
+            dates[field] = None
+        if raw and dates[field] is None:
+            errors[field] = "Please enter a valid date (YYYY-MM-DD)."
+    if errors:
+        return _certificates_page(
+            request,
+            export={"course_id": course.pk if course else None, "dates": raw_dates, "errors": errors},
+            status=400,
+        )
+    date_from, date_to = dates["from"], dates["to"]
+
+    certificates = certificate_batch(course=course, date_from=date_from, date_to=date_to)
+    if not certificates.exists():
+        messages.warning(request, "No certificates match the selected filters.")
+        return redirect("academy_manager_certificates")
+
+    name_parts = ["certificates"]
+    if course is not None:
+        name_parts.append(course.slug)
+    if date_from:
+        name_parts.append(f"from-{date_from.isoformat()}")
+    if date_to:
+        name_parts.append(f"to-{date_to.isoformat()}")
+    filename = "-".join(name_parts) + ".zip"
+
+    response = StreamingHttpResponse(stream_certificates_zip(certificates), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 @superuser_required
@@ -778,37 +1019,46 @@ def manager_documents(request):
     return render(request, "academy/manager/documents.html", {"documents": documents})
 
 
+FINAL_TEST_SORTS = {
+    "newest": ("-submitted_at",),
+    "score_desc": ("-score_percent", "-submitted_at"),
+    "score_asc": ("score_percent", "-submitted_at"),
+}
+
+
 @superuser_required
 def manager_final_tests(request):
+    """
+    Final test review list. Score summary columns are stored on the submission,
+    so sorting and filtering by score happen in SQL.
+    """
+    sort = request.GET.get("sort") or "newest"
+    if sort not in FINAL_TEST_SORTS:
+        sort = "newest"
+
     submissions = (
         FinalTestSubmission.objects
         .select_related("user", "module")
-        .all()
-        .order_by("-submitted_at")
+        .defer("answers")
+        .order_by(*FINAL_TEST_SORTS[sort])
     )
 
-    # Attach summary stats to each submission instance
-    for s in submissions:
-        answers = s.answers or []
-        total = len(answers)
-        correct = sum(1 for a in answers if a.get("is_correct"))
-        incorrect = total - correct
-
-        if total > 0:
-            score_percent = int((correct / total) * 100)
-        else:
-            score_percent = 0
-
-        # Add attributes for the template to use
-        s.total_questions = total
-        s.correct_count = correct
-        s.incorrect_count = incorrect
-        s.score_percent = score_percent
+    min_score = (request.GET.get("min_score") or "").strip()
+    max_score = (request.GET.get("max_score") or "").strip()
+    if min_score.isdigit():
+        submissions = submissions.filter(score_percent__gte=int(min_score))
+    if max_score.isdigit():
+        submissions = submissions.filter(score_percent__lte=int(max_score))
 
     return render(
         request,
         "academy/manager/final_tests.html",
-        {"submissions": submissions},
+        {
+            "submissions": submissions,
+            "sort": sort,
+            "min_score": min_score,
+            "max_score": max_score,
+        },
     )
 
 
@@ -837,7 +1087,7 @@ def manager_mark_pass(request, submission_id):
     now = timezone.now()
     mp.completed_at = mp.completed_at or now
     mp.last_attempt_at = now
-    mp.save()
+    mp.save(update_fields=ModuleProgress.PROGRESS_FIELDS)
 
     # 🟡 CREATE CERTIFICATE IF NONE EXISTS
     course = submission.module.course
@@ -1182,41 +1432,50 @@ def add_lesson(request, module_id):
     )
 
 
+DRIVER_PROGRESS_PAGE_SIZE = 50
+
+
 @superuser_required
 def manager_driver_progress(request):
-    from django.contrib.auth import get_user_model
+    """
+    Drivers x modules matrix, one page of drivers at a time. Progress for the
+    page comes from a single left-joined query.
+    """
     User = get_user_model()
 
-    users = User.objects.filter(is_superuser=False).order_by("username")
-    modules = Module.objects.all().order_by("course__order", "order")
-
-    display_rows = []
-
-    for user in users:
-        for module in modules:
-            mp = ModuleProgress.objects.filter(user=user, module=module).first()
-
-            if mp:
-                status = mp.status
-                score = mp.score
-                completed_at = mp.completed_at
-            else:
-                status = "not_started"
-                score = None
-                completed_at = None
+    q = (request.GET.get("q") or "").strip()
+    users = (
+        User.objects
+        .filter(is_superuser=False)
+        .only("pk", "username", "first_name", "last_name")
+        .order_by("username")
+    )
+    if q:
+        users = users.filter(
+            Q(username__icontains=q) | Q(first_name__icontains=q) | Q(last_name__icontains=q)
+        )
 
-            display_rows.append({
-                "user": user,
-                "module": module,
-                "score": score,
-                "status": status,
-                "completed_at": completed_at,
-            })
+    modules = list(
+        Module.objects
+        .select_related("course")
+        .only("pk", "title", "order", "course__title", "course__order")
+        .order_by("course__order", "order")
+    )
 
-    return render(request, "academy/manager/driver_progress_all.html", {
-        "rows": display_rows
-    })
+    page_obj = Paginator(users, DRIVER_PROGRESS_PAGE_SIZE).get_page(request.GET.get("page"))
+    page_users = list(page_obj.object_list)
+    matrix = driver_progress_matrix([u.pk for u in page_users], modules)
 
+    return render(
+        request,
+        "academy/manager/driver_progress_all.html",
+        {
+            "modules": modules,
+            "rows": [(user, matrix[user.pk]) for user in page_users],
+            "page_obj": page_obj,
+            "q": q,
+        },
+    )
 
 
 @login_required
@@ -1274,137 +1533,234 @@ def manage_questions(request):
     })
 
 
+EXPORT_FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", stream_xlsx),
+}
+
+
+@superuser_required
+def manager_export_training_records(request):
+    """
+    Training record exports. Without a 'format' parameter this shows the
+    export form; otherwise the file is streamed row by row.
+    """
+    courses = Course.objects.order_by("order", "title")
+    groups = Group.objects.order_by("name")
+
+    export_format = request.GET.get("format")
+    kind = request.GET.get("kind", "progress")
+    if export_format not in EXPORT_FORMATS or kind not in EXPORT_KINDS:
+        return render(request, "academy/manager/exports.html", {
+            "courses": courses,
+            "groups": groups,
+        })
+
+    course = None
+    course_id = request.GET.get("course")
+    if course_id and course_id.isdigit():
+        course = get_object_or_404(Course, pk=course_id)
+
+    group = None
+    group_id = request.GET.get("group")
+    if group_id and group_id.isdigit():
+        group = get_object_or_404(Group, pk=group_id)
+
+    header, row_source = EXPORT_KINDS[kind]
+    content_type, writer = EXPORT_FORMATS[export_format]
+
+    name_parts = ["training", kind]
+    if course is not None:
+        name_parts.append(course.slug)
+    if group is not None:
+        name_parts.append(slugify(group.name))
+    name_parts.append(timezone.localdate().isoformat())
+    filename = "-".join(name_parts) + "." + export_format
+
+    response = StreamingHttpResponse(
+        writer(header, row_source(course=course, group=group)),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@superuser_required
+def manager_compliance(request):
+    """
+    Per group + course: share of drivers who passed every mandatory module.
+    Selecting a pair lists the drivers still outstanding.
+    """
+    rows = [
+        {"group": group, "course": course, **compliance_summary(group, course)}
+        for group, course in group_course_pairs()
+    ]
+
+    selected = None
+    group_id = request.GET.get("group")
+    course_id = request.GET.get("course")
+    if group_id and course_id and group_id.isdigit() and course_id.isdigit():
+        group = get_object_or_404(Group, pk=group_id)
+        course = get_object_or_404(Course, pk=course_id)
+        drivers, mandatory = non_compliant_drivers(group, course)
+        selected = {
+            "group": group,
+            "course": course,
+            "drivers": drivers,
+            "mandatory_modules": mandatory,
+        }
+
+    return render(request, "academy/manager/compliance.html", {
+        "rows": rows,
+        "selected": selected,
+    })
+
+
+@superuser_required
+def manager_users_import(request):
+    """
+    Bulk onboarding from CSV: validate everything up front, create accounts
+    in bulk with unusable passwords and email one-time invite links.
+    """
+    context = {"columns": ONBOARDING_COLUMNS, "errors": [], "invites": []}
+
+    if request.method == "POST":
+        uploaded_file = request.FILES.get("csv_file")
+        if not uploaded_file:
+            messages.error(request, "No CSV file uploaded.")
+            return redirect("academy_manager_users_import")
+
+        try:
+            rows = parse_onboarding_csv(uploaded_file)
+        except OnboardingError as exc:
+            messages.error(request, str(exc))
+            return redirect("academy_manager_users_import")
+
+        if not rows:
+            messages.warning(request, "The CSV has no driver rows.")
+            return redirect("academy_manager_users_import")
+
+        errors, courses_by_slug, groups_by_name = validate_onboarding_rows(rows)
+        if errors:
+            messages.error(request, "No accounts were created. Fix the rows below and upload again.")
+            context["errors"] = errors
+        else:
+            users = onboard_users(rows, courses_by_slug, groups_by_name)
+            context["invites"] = send_invites(request, users)
+            messages.success(request, f"Created {len(users)} driver accounts and emailed their invite links.")
+
+    return render(request, "academy/manager/users_import.html", context)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def manager_question_stats(request):
+    """
+    Item analysis per question, read from the incrementally maintained
+    stats tables (never scans QuizAttempt).
+    """
+    modules = Module.objects.select_related("course").order_by("course__title", "order")
+
+    module = None
+    module_id = request.GET.get("module")
+    if module_id and module_id.isdigit():
+        module = modules.filter(pk=module_id).first()
+
+    return render(request, "academy/manager/question_stats.html", {
+        "modules": modules,
+        "selected_module": module,
+        "rows": question_stats_rows(module),
+    })
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def import_questions(request):
     if request.method == "POST":
         module_id = request.POST.get("module_id")
         delete_existing = request.POST.get("delete_existing") == "on"
+        dry_run = request.POST.get("dry_run") == "on"
         uploaded_file = request.FILES.get("json_file")
 
         if not uploaded_file:
             messages.error(request, "No JSON file uploaded.")
             return redirect("academy_import_questions")
 
-        # Load raw JSON
-        try:
-            data = json.load(uploaded_file)
-        except json.JSONDecodeError:
-            messages.error(request, "Invalid JSON format.")
-            return redirect("academy_import_questions")
-
         # Validate module from form
         try:
             default_module = Module.objects.get(id=module_id)
-        except Module.DoesNotExist:
+        except (Module.DoesNotExist, ValueError):
             messages.error(request, "Module not found.")
             return redirect("academy_import_questions")
 
-        # Delete existing questions if checkbox ticked
+        # Parsed incrementally and written in one transaction (see question_import.py)
+        try:
+            result = run_question_import(
+                uploaded_file,
+                default_module,
+                delete_existing=delete_existing,
+                dry_run=dry_run,
+            )
+        except QuestionImportError as exc:
+            messages.error(request, str(exc))
+            return redirect("academy_import_questions")
+
+        for error in result["errors"]:
+            messages.error(request, error)
+
+        summary = (
+            f"{result['questions']} questions and {result['choices']} choices. "
+            f"Skipped {result['skipped']}."
+        )
         if delete_existing:
-            Question.objects.filter(module=default_module).delete()
-
-        created_q = 0
-        created_c = 0
-        skipped = 0
-
-        # ------------------------------------------------------------------
-        # DETECT FORMAT TYPE
-        # ------------------------------------------------------------------
-        fixture_format = False
-        if isinstance(data, list) and len(data) > 0:
-            first = data[0]
-            fixture_format = "model" in first and "fields" in first
-
-        # ------------------------------------------------------------------
-        # FORMAT A: Django fixture format
-        # ------------------------------------------------------------------
-        if fixture_format:
-            question_map = {}  # map pk → created Question object
-
-            for obj in data:
-                model = obj.get("model")
-                fields = obj.get("fields", {})
-
-                # Create Question
-                if model == "academy.question":
-                    module = default_module
-
-                    # If fixture specifies module override
-                    mod_id = fields.get("module")
-                    if mod_id:
-                        module = Module.objects.filter(id=mod_id).first() or module
-
-                    q = Question.objects.create(
-                        module=module,
-                        text=fields.get("text", ""),
-                        order=fields.get("order", 1),
-                        explanation=fields.get("explanation", "")
-                    )
-                    question_map[obj["pk"]] = q
-                    created_q += 1
-
-                # Create Choice
-                elif model == "academy.choice":
-                    q_pk = fields.get("question")
-                    question = question_map.get(q_pk)
-
-                    # If question doesn’t exist
-                    if not question:
-                        skipped += 1
-                        continue
-
-                    Choice.objects.create(
-                        question=question,
-                        text=fields.get("text", ""),
-                        is_correct=fields.get("is_correct", False)
-                    )
-                    created_c += 1
-
-        # ------------------------------------------------------------------
-        # FORMAT B: Clean custom JSON format
-        # ------------------------------------------------------------------
+            summary += f" Existing questions removed: {result['deleted']}."
+
+        if result["errors"]:
+            if not dry_run:
+                messages.warning(request, "Nothing was imported. Fix the entries above and try again.")
+        elif dry_run:
+            messages.info(request, f"Dry run OK – would import {summary}")
         else:
-            for entry in data:
-                # Must contain text + choices
-                if "text" not in entry or "choices" not in entry:
-                    skipped += 1
-                    continue
-
-                # Module override by slug
-                module = default_module
-                slug = entry.get("module_slug")
-                if slug:
-                    module = Module.objects.filter(slug=slug).first() or default_module
-
-                q = Question.objects.create(
-                    module=module,
-                    text=entry["text"],
-                    order=entry.get("order", 1),
-                    explanation=entry.get("explanation", "")
-                )
-                created_q += 1
+            messages.success(request, f"Imported {summary}")
+        return redirect("academy_import_questions")
 
-                # Add choices
-                for ch in entry["choices"]:
-                    Choice.objects.create(
-                        question=q,
-                        text=ch["text"],
-                        is_correct=ch.get("is_correct", False)
-                    )
-                    created_c += 1
+    modules = Module.objects.all()
+    courses = Course.objects.order_by("order", "title")
+    return render(request, "academy/manager/import_questions.html", {
+        "modules": modules,
+        "courses": courses,
+    })
 
-        # ------------------------------------------------------------------
 
-        messages.success(
-            request,
-            f"Imported {created_q} questions and {created_c} choices. "
-            f"Skipped {skipped}."
-        )
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_questions(request):
+    """
+    Stream a module's or course's question bank as JSON in either import format.
+    """
+    fmt = request.GET.get("format", "custom")
+    if fmt not in QUESTION_EXPORT_FORMATS:
+        fmt = "custom"
+
+    module = course = None
+    module_id = request.GET.get("module")
+    course_id = request.GET.get("course")
+    if module_id and module_id.isdigit():
+        module = get_object_or_404(Module.objects.select_related("course"), pk=module_id)
+        name = f"{module.course.slug}-{module.slug}"
+    elif course_id and course_id.isdigit():
+        course = get_object_or_404(Course, pk=course_id)
+        name = course.slug
+    else:
+        messages.error(request, "Choose a module or a course to export.")
         return redirect("academy_import_questions")
 
-    modules = Module.objects.all()
-    return render(request, "academy/manager/import_questions.html", {"modules": modules})
+    response = StreamingHttpResponse(
+        stream_questions_json(export_queryset(module=module, course=course), fmt),
+        content_type="application/json; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="questions-{name}-{fmt}.json"'
+    return response
 
 
 @superuser_required
@@ -0,0 +1,27 @@
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+
+class InviteTokenGenerator(PasswordResetTokenGenerator):
+    """
+    One-time invite tokens. The token hashes the user's password, so it stops
+    working as soon as the invited user sets one. A separate salt keeps invite
+    and password-reset tokens from being interchangeable.
+    """
+    key_salt = "accounts.invites.InviteTokenGenerator"
+
+
+invite_token_generator = InviteTokenGenerator()
+
+
+def invite_path(user):
+    return reverse("account_accept_invite", kwargs={
+        "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": invite_token_generator.make_token(user),
+    })
+
+
+def invite_url(request, user):
+    return request.build_absolute_uri(invite_path(user))
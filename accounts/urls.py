@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("profile/", views.profile, name="account_profile"),
+    path("invite/<uidb64>/<token>/", views.accept_invite, name="account_accept_invite"),
 ]
@@ -1,7 +1,45 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.forms import SetPasswordForm
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+
+from allauth.account.models import EmailAddress
+
+from .invites import invite_token_generator
 
 
 @login_required
 def profile(request):
     return render(request, "account/profile.html")
+
+
+def accept_invite(request, uidb64, token):
+    """
+    Invited users choose their first password here. The link works once.
+    """
+    User = get_user_model()
+    try:
+        user = User.objects.get(pk=force_str(urlsafe_base64_decode(uidb64)), is_active=True)
+    except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+        user = None
+
+    if user is None or not invite_token_generator.check_token(user, token):
+        return render(request, "account/accept_invite.html", {"token_fail": True})
+
+    form = SetPasswordForm(user, request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        form.save()
+        # The invite was delivered to this address, so it counts as verified
+        if user.email:
+            EmailAddress.objects.update_or_create(
+                user=user,
+                email__iexact=user.email,
+                defaults={"email": user.email, "verified": True, "primary": True},
+            )
+        messages.success(request, "Your password has been set. You can now log in.")
+        return redirect("account_login")
+
+    return render(request, "account/accept_invite.html", {"form": form, "invited_user": user})
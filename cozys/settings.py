@@ -122,6 +122,29 @@ DATABASES = {
 }
 
 
+# -------------------------------------------------------------------
+# Cache
+# -------------------------------------------------------------------
+# Production sets REDIS_URL (e.g. the Heroku Redis add-on): one in-memory
+# cache shared by every gunicorn worker and management command, so an
+# invalidation made in one process is seen by all of them. Cached reads cost
+# no database queries. Without REDIS_URL (local development, tests) each
+# process has its own LocMem cache.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # -------------------------------------------------------------------
 # Authentication / Allauth
 # -------------------------------------------------------------------
@@ -170,6 +193,14 @@ STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY")
 if not STRIPE_PUBLIC_KEY or not STRIPE_SECRET_KEY:
     raise ValueError("STRIPE KEYS NOT FOUND — check env.py")
 
+# =======================
+# ACADEMY CERTIFICATES
+# =======================
+# Print a QR code linking to the public verification page on each PDF.
+# The link uses ACADEMY_VERIFY_BASE_URL, or the current Site's domain if unset.
+ACADEMY_CERTIFICATE_QR = True
+ACADEMY_VERIFY_BASE_URL = os.environ.get("ACADEMY_VERIFY_BASE_URL", "")
+
 
 
 # -------------------------------------------------------------------
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LiveOpsCredential, OpsRoute, OpsJourney
+from .models import LiveOpsCredential, OpsRoute, OpsJourney, OpsTodoTemplate
 
 
 @admin.register(LiveOpsCredential)
@@ -23,3 +23,10 @@ class OpsJourneyAdmin(admin.ModelAdmin):
     list_filter = ("status", "service_date")
     search_fields = ("route__code", "route__name", "reason")
     autocomplete_fields = ("route", "updated_by")
+
+
+@admin.register(OpsTodoTemplate)
+class OpsTodoTemplateAdmin(admin.ModelAdmin):
+    list_display = ("title", "recurrence", "weekday", "day_of_month", "assigned_to", "is_active", "updated_at")
+    list_filter = ("recurrence", "is_active")
+    search_fields = ("title", "description", "assigned_to__username")
@@ -0,0 +1,86 @@
+# home/journal_digest.py
+from __future__ import annotations
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+
+from .models import OpsDailyJournal
+
+User = get_user_model()
+
+DIGEST_TIMEOUT = 60 * 60 * 24
+
+
+def _digest_version_key(entry_date) -> str:
+    return f"ops:journal_digest_v:{entry_date.isoformat()}"
+
+
+def _new_version() -> int:
+    return time.time_ns() // 1000
+
+
+def _digest_version(entry_date) -> int:
+    return cache.get_or_set(_digest_version_key(entry_date), _new_version, None)
+
+
+def invalidate_journal_digest(entry_date) -> None:
+    """
+    Bump the per-date version so every cached digest for that date
+    (all depots) is stale at once. Called from journal autosave.
+    """
+    key = _digest_version_key(entry_date)
+    cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), None))
+
+
+def digest_journals(entry_date, depot=None):
+    """
+    All journals for one date (optionally one depot = auth Group), in a single query.
+    """
+    journals = (
+        OpsDailyJournal.objects
+        .filter(entry_date=entry_date)
+        .select_related("user")
+        .order_by("user__first_name", "user__last_name", "user__username")
+    )
+    if depot is not None:
+        journals = journals.filter(user__groups=depot)
+    return journals
+
+
+def render_journal_digest(entry_date, depot=None) -> str:
+    """
+    Rendered digest fragment, cached per date + depot until a journal
+    for that date is saved again.
+    """
+    depot_key = depot.pk if depot is not None else "all"
+    key = f"ops:journal_digest:{entry_date.isoformat()}:{depot_key}:{_digest_version(entry_date)}"
+
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            "home/ops/_journal_digest.html",
+            {"journals": digest_journals(entry_date, depot), "entry_date": entry_date},
+        )
+        cache.set(key, html, DIGEST_TIMEOUT)
+    return html
+
+
+def digest_recipients():
+    """
+    Email addresses of Live Ops managers (superusers + enabled credentials).
+    """
+    return list(
+        User.objects
+        .filter(is_active=True)
+        .filter(Q(is_superuser=True) | Q(live_ops_credential__is_enabled=True))
+        .exclude(email__isnull=True)
+        .exclude(email__exact="")
+        .values_list("email", flat=True)
+        .distinct()
+    )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from home.recurring import materialise_due_todos
+
+
+class Command(BaseCommand):
+    help = (
+        "Create today's to-do items for all active recurring templates. "
+        "Safe to run repeatedly (e.g. from cron / Heroku Scheduler)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Run for a specific date (YYYY-MM-DD) instead of today.",
+        )
+
+    def handle(self, *args, **options):
+        on_date = None
+        if options.get("date"):
+            try:
+                on_date = parse_date(options["date"])
+            except ValueError:
+                # Well-formed but impossible, e.g. 2026-02-30
+                on_date = None
+            if on_date is None:
+                raise CommandError("Invalid --date, expected YYYY-MM-DD.")
+
+        created = materialise_due_todos(on_date=on_date)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} recurring to-do item(s)."))
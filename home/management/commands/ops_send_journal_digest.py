@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from home.journal_digest import digest_journals, digest_recipients
+
+
+class Command(BaseCommand):
+    help = (
+        "Email the daily journal digest to Live Ops managers. "
+        "Intended for a scheduler (e.g. end of shift); defaults to today."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Digest date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--depot", help="Limit to one depot (auth Group name).")
+
+    def handle(self, *args, **options):
+        entry_date = timezone.localdate()
+        if options.get("date"):
+            try:
+                entry_date = parse_date(options["date"])
+            except ValueError:
+                # Well-formed but impossible, e.g. 2026-02-30
+                entry_date = None
+            if entry_date is None:
+                raise CommandError("Invalid --date, expected YYYY-MM-DD.")
+
+        depot = None
+        if options.get("depot"):
+            depot = Group.objects.filter(name=options["depot"]).first()
+            if depot is None:
+                raise CommandError(f"Depot '{options['depot']}' not found.")
+
+        recipients = digest_recipients()
+        if not recipients:
+            self.stdout.write("No manager email addresses found; nothing sent.")
+            return
+
+        journals = list(digest_journals(entry_date, depot))
+        context = {
+            "entry_date": entry_date,
+            "depot": depot,
+            "journals": journals,
+        }
+
+        subject = f"[Cozy Ops] Journal digest – {entry_date:%d %b %Y}"
+        if depot:
+            subject += f" ({depot.name})"
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=render_to_string("home/ops/emails/journal_digest.txt", context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=recipients,
+        )
+        email.attach_alternative(
+            render_to_string("home/ops/emails/journal_digest.html", context),
+            "text/html",
+        )
+        email.send()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent digest of {len(journals)} journal(s) to {len(recipients)} manager(s)."
+        ))
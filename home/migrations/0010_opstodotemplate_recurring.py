@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_enforce_assigned_to_not_null'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opstodoitem',
+            name='period_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='OpsTodoTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('recurrence', models.CharField(choices=[('daily', 'Daily'), ('weekdays', 'Weekdays (Mon–Fri)'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], default='daily', max_length=20)),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], null=True)),
+                ('day_of_month', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assigned_to', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ops_todo_templates_assigned', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ops_todo_templates_created', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ops recurring to-do',
+                'verbose_name_plural': 'Ops recurring to-dos',
+                'ordering': ['title'],
+            },
+        ),
+        migrations.AddField(
+            model_name='opstodoitem',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='home.opstodotemplate'),
+        ),
+        migrations.AddConstraint(
+            model_name='opstodoitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('template__isnull', False)), fields=('template', 'period_start'), name='uniq_ops_todo_template_period'),
+        ),
+    ]
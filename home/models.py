@@ -1,3 +1,6 @@
+import calendar
+from datetime import timedelta
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -284,6 +287,16 @@ class OpsTodoItem(models.Model):
     is_done = models.BooleanField(default=False)
     done_at = models.DateTimeField(null=True, blank=True)
 
+    # recurring source (set by the scheduler, empty for one-off items)
+    template = models.ForeignKey(
+        "OpsTodoTemplate",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="items",
+    )
+    period_start = models.DateField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -291,6 +304,108 @@ class OpsTodoItem(models.Model):
         ordering = ["is_done", "-created_at"]
         verbose_name = "Ops To-do"
         verbose_name_plural = "Ops To-dos"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["template", "period_start"],
+                condition=models.Q(template__isnull=False),
+                name="uniq_ops_todo_template_period",
+            )
+        ]
 
     def __str__(self) -> str:
         return self.title
+
+
+class OpsTodoTemplate(models.Model):
+    """
+    Recurring to-do definition. The scheduler materialises one OpsTodoItem
+    per template per period (see home/recurring.py).
+    """
+    RECUR_DAILY = "daily"
+    RECUR_WEEKDAYS = "weekdays"
+    RECUR_WEEKLY = "weekly"
+    RECUR_MONTHLY = "monthly"
+
+    RECURRENCE_CHOICES = [
+        (RECUR_DAILY, "Daily"),
+        (RECUR_WEEKDAYS, "Weekdays (Mon–Fri)"),
+        (RECUR_WEEKLY, "Weekly"),
+        (RECUR_MONTHLY, "Monthly"),
+    ]
+
+    WEEKDAY_CHOICES = [
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    ]
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ops_todo_templates_created",
+    )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ops_todo_templates_assigned",
+    )
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+
+    recurrence = models.CharField(max_length=20, choices=RECURRENCE_CHOICES, default=RECUR_DAILY)
+
+    # Used by WEEKLY (day of week) and MONTHLY (day of month, clamped to month end)
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, null=True, blank=True)
+    day_of_month = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["title"]
+        verbose_name = "Ops recurring to-do"
+        verbose_name_plural = "Ops recurring to-dos"
+
+    def clean(self):
+        if self.recurrence == self.RECUR_WEEKLY and self.weekday is None:
+            raise ValidationError({"weekday": "A day of the week is required for weekly to-dos."})
+        if self.recurrence == self.RECUR_MONTHLY:
+            if not self.day_of_month or not 1 <= self.day_of_month <= 31:
+                raise ValidationError({"day_of_month": "Day of month must be between 1 and 31."})
+
+    def due_period(self, on_date):
+        """
+        Return the start date of the period that is due on 'on_date', or None.
+
+        Weekly and monthly items become due on their day and stay due for the
+        rest of the period, so a missed scheduler run still catches up once.
+        """
+        if self.recurrence == self.RECUR_DAILY:
+            return on_date
+
+        if self.recurrence == self.RECUR_WEEKDAYS:
+            return on_date if on_date.weekday() < 5 else None
+
+        if self.recurrence == self.RECUR_WEEKLY:
+            if self.weekday is None or on_date.weekday() < self.weekday:
+                return None
+            return on_date - timedelta(days=on_date.weekday())
+
+        if self.recurrence == self.RECUR_MONTHLY:
+            last_day = calendar.monthrange(on_date.year, on_date.month)[1]
+            due_day = min(self.day_of_month or 1, last_day)
+            if on_date.day < due_day:
+                return None
+            return on_date.replace(day=1)
+
+        return None
+
+    def __str__(self) -> str:
+        return f"{self.title} ({self.get_recurrence_display()})"
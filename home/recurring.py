@@ -0,0 +1,80 @@
+# home/recurring.py
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OpsTodoItem, OpsTodoTemplate
+from .todos import invalidate_todo_counts
+
+
+def _existing_periods(due) -> set:
+    """
+    (template_id, period_start) pairs that already have an item, for the due pairs only.
+    """
+    pairs = Q()
+    for t, period in due.values():
+        pairs |= Q(template_id=t.pk, period_start=period)
+    return set(OpsTodoItem.objects.filter(pairs).values_list("template_id", "period_start"))
+
+
+def materialise_due_todos(on_date=None, templates=None) -> int:
+    """
+    Create the OpsTodoItem rows that are due on 'on_date' for every active template.
+
+    Idempotent per period: items already created for a (template, period_start)
+    pair are skipped, and the unique constraint on OpsTodoItem backs this up if
+    two runs overlap. Returns the number of items actually inserted by this run.
+    """
+    on_date = on_date or timezone.localdate()
+
+    if templates is None:
+        templates = OpsTodoTemplate.objects.filter(is_active=True)
+
+    due = {}
+    for t in templates:
+        period = t.due_period(on_date)
+        if period is not None:
+            due[t.pk] = (t, period)
+
+    if not due:
+        return 0
+
+    with transaction.atomic():
+        # Overlapping runs wait here for each other, so 'existing' already
+        # includes anything another run inserted for these templates
+        list(OpsTodoTemplate.objects.select_for_update().filter(pk__in=due).values_list("pk", flat=True))
+        existing = _existing_periods(due)
+
+        to_create = [
+            OpsTodoItem(
+                user_id=t.created_by_id,
+                sent_by_id=t.created_by_id,
+                assigned_to_id=t.assigned_to_id,
+                title=t.title[:200].upper(),
+                description=t.description,
+                template=t,
+                period_start=period,
+            )
+            for t, period in due.values()
+            if (t.pk, period) not in existing
+        ]
+
+        if not to_create:
+            return 0
+
+        OpsTodoItem.objects.bulk_create(to_create, ignore_conflicts=True)
+
+        # ignore_conflicts hides skipped rows, so count what is there now
+        # rather than what was attempted
+        created = _existing_periods(due) - existing
+
+    if created:
+        invalidate_todo_counts(*{
+            uid
+            for template_id, _ in created
+            for uid in (due[template_id][0].created_by_id, due[template_id][0].assigned_to_id)
+        })
+
+    return len(created)
@@ -1,3 +1,277 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .journal_digest import render_journal_digest
+from .models import OpsDailyJournal, OpsTodoItem, OpsTodoTemplate
+from .recurring import materialise_due_todos
+
+User = get_user_model()
+
+
+class RecurringTodoTests(TestCase):
+    """
+    Recurring templates materialise one item per period, however often the
+    scheduler runs, and the reported count is what was really inserted.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username="manager", password="pw", is_staff=True)
+        self.controller = User.objects.create_user(username="controller", password="pw", is_staff=True)
+        self.template = OpsTodoTemplate.objects.create(
+            created_by=self.manager,
+            assigned_to=self.controller,
+            title="Check fuel cards",
+            recurrence=OpsTodoTemplate.RECUR_WEEKLY,
+            weekday=0,
+        )
+        self.monday = datetime.date(2026, 10, 19)
+
+    def test_reruns_are_idempotent(self):
+        self.assertEqual(materialise_due_todos(on_date=self.monday), 1)
+        self.assertEqual(materialise_due_todos(on_date=self.monday), 0)
+        # Later in the same week is still the same period
+        self.assertEqual(materialise_due_todos(on_date=self.monday + datetime.timedelta(days=3)), 0)
+
+        item = OpsTodoItem.objects.get(template=self.template)
+        self.assertEqual(item.period_start, self.monday)
+        self.assertEqual(item.title, "CHECK FUEL CARDS")
+        self.assertEqual(item.assigned_to, self.controller)
+
+        # Next week is a new period
+        self.assertEqual(materialise_due_todos(on_date=self.monday + datetime.timedelta(days=7)), 1)
+        self.assertEqual(OpsTodoItem.objects.filter(template=self.template).count(), 2)
+
+    def test_existing_items_are_not_counted(self):
+        OpsTodoItem.objects.create(
+            user=self.manager,
+            assigned_to=self.controller,
+            title="CHECK FUEL CARDS",
+            template=self.template,
+            period_start=self.monday,
+        )
+        other = OpsTodoTemplate.objects.create(
+            created_by=self.manager,
+            assigned_to=self.controller,
+            title="Walk the yard",
+            recurrence=OpsTodoTemplate.RECUR_DAILY,
+        )
+
+        self.assertEqual(materialise_due_todos(on_date=self.monday), 1)
+        self.assertEqual(OpsTodoItem.objects.filter(template=self.template).count(), 1)
+        self.assertEqual(OpsTodoItem.objects.filter(template=other).count(), 1)
+
+    def test_unique_constraint_backs_up_overlapping_runs(self):
+        materialise_due_todos(on_date=self.monday)
+        duplicate = dict(
+            user=self.manager,
+            assigned_to=self.controller,
+            title="CHECK FUEL CARDS",
+            template=self.template,
+            period_start=self.monday,
+        )
+
+        OpsTodoItem.objects.bulk_create([OpsTodoItem(**duplicate)], ignore_conflicts=True)
+        self.assertEqual(OpsTodoItem.objects.filter(template=self.template).count(), 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            OpsTodoItem.objects.create(**duplicate)
+
+    def test_command_reports_created_items(self):
+        out = StringIO()
+        call_command("ops_generate_recurring_todos", "--date", "2026-10-19", stdout=out)
+        self.assertIn("Created 1 recurring to-do item(s).", out.getvalue())
+
+        out = StringIO()
+        call_command("ops_generate_recurring_todos", "--date", "2026-10-19", stdout=out)
+        self.assertIn("Created 0 recurring to-do item(s).", out.getvalue())
+
+    def test_command_rejects_impossible_date(self):
+        with self.assertRaises(CommandError):
+            call_command("ops_generate_recurring_todos", "--date", "2026-02-30", stdout=StringIO())
+
+
+class TodoCountTests(TestCase):
+    """
+    The navbar badge is served from a cached per-user counter that every
+    to-do write invalidates for both the creator and the assignee.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username="manager", password="pw", is_staff=True)
+        self.controller = User.objects.create_user(username="controller", password="pw", is_staff=True)
+        self.client.force_login(self.controller)
+
+    def _counts(self):
+        response = self.client.get(reverse("ops_todo_counts"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        return response.json()
+
+    def test_counts_open_and_assigned(self):
+        OpsTodoItem.objects.create(user=self.controller, assigned_to=self.manager, title="MINE")
+        OpsTodoItem.objects.create(user=self.manager, assigned_to=self.controller, title="FOR ME")
+        OpsTodoItem.objects.create(user=self.manager, assigned_to=self.manager, title="NOT MINE")
+        OpsTodoItem.objects.create(user=self.controller, assigned_to=self.controller, title="DONE", is_done=True)
+
+        self.assertEqual(self._counts(), {"open": 2, "assigned_to_me": 1})
+
+    def test_counts_are_cached_until_a_write(self):
+        self.assertEqual(self._counts(), {"open": 0, "assigned_to_me": 0})
+
+        # Written behind the views' back: the cached counter is still served
+        OpsTodoItem.objects.create(user=self.manager, assigned_to=self.controller, title="SILENT")
+        self.assertEqual(self._counts(), {"open": 0, "assigned_to_me": 0})
+
+        # A manager sending a to-do invalidates the assignee's counter too
+        self.client.force_login(self.manager)
+        self.client.post(reverse("ops_todo_add"), {"title": "Call depot", "assigned_to": self.controller.pk})
+        self.client.force_login(self.controller)
+        self.assertEqual(self._counts(), {"open": 2, "assigned_to_me": 2})
+
+        todo = OpsTodoItem.objects.get(title="CALL DEPOT")
+        self.client.post(reverse("ops_todo_complete", args=[todo.pk]))
+        self.assertEqual(self._counts(), {"open": 1, "assigned_to_me": 1})
+
+
+class TodoBulkTests(TestCase):
+    """
+    Bulk complete / hand-over only touches open to-dos the user created or
+    was assigned; anything else in the selection is skipped.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.controller = User.objects.create_user(username="controller", password="pw", is_staff=True)
+        self.colleague = User.objects.create_user(username="colleague", password="pw", is_staff=True)
+        self.driver = User.objects.create_user(username="driver", password="pw")
+        self.client.force_login(self.controller)
+
+        self.mine = OpsTodoItem.objects.create(user=self.controller, assigned_to=self.controller, title="MINE")
+        self.for_me = OpsTodoItem.objects.create(user=self.colleague, assigned_to=self.controller, title="FOR ME")
+        self.theirs = OpsTodoItem.objects.create(user=self.colleague, assigned_to=self.colleague, title="THEIRS")
+        self.done = OpsTodoItem.objects.create(
+            user=self.controller, assigned_to=self.controller, title="DONE", is_done=True
+        )
+        self.selection = [self.mine.pk, self.for_me.pk, self.theirs.pk, self.done.pk]
+
+    def test_complete_skips_other_peoples_todos(self):
+        response = self.client.post(reverse("ops_todo_bulk"), {"action": "complete", "todo_ids": self.selection})
+        self.assertRedirects(response, reverse("ops_hub"), fetch_redirect_response=False)
+
+        self.assertEqual(
+            set(OpsTodoItem.objects.filter(is_done=True).values_list("pk", flat=True)),
+            {self.mine.pk, self.for_me.pk, self.done.pk},
+        )
+        self.theirs.refresh_from_db()
+        self.assertFalse(self.theirs.is_done)
+
+        message = str(list(get_messages(response.wsgi_request))[0])
+        self.assertIn("2 to-do(s) marked as DONE.", message)
+        self.assertIn("Skipped 2", message)
+
+    def test_reassign_hands_over_allowed_todos(self):
+        self.client.post(
+            reverse("ops_todo_bulk"),
+            {"action": "reassign", "assigned_to": self.colleague.pk, "todo_ids": self.selection},
+        )
+
+        self.mine.refresh_from_db()
+        self.for_me.refresh_from_db()
+        self.assertEqual(self.mine.assigned_to, self.colleague)
+        self.assertEqual(self.for_me.assigned_to, self.colleague)
+        self.assertEqual(self.for_me.sent_by, self.controller)
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.assigned_to, self.controller)
+
+    def test_reassign_to_non_staff_is_refused(self):
+        self.client.post(
+            reverse("ops_todo_bulk"),
+            {"action": "reassign", "assigned_to": self.driver.pk, "todo_ids": [self.mine.pk]},
+        )
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.assigned_to, self.controller)
+
+    def test_nothing_allowed_changes_nothing(self):
+        self.client.post(reverse("ops_todo_bulk"), {"action": "complete", "todo_ids": [self.theirs.pk]})
+        self.theirs.refresh_from_db()
+        self.assertFalse(self.theirs.is_done)
+
+
+class JournalDigestTests(TestCase):
+    """
+    The manager digest lists every controller's journal for one date,
+    cached per date and refreshed when a journal for that date is saved.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(
+            username="manager", password="pw", email="manager@example.com", is_superuser=True
+        )
+        self.alice = User.objects.create_user(username="alice", password="pw", first_name="Alice")
+        self.bob = User.objects.create_user(username="bob", password="pw", first_name="Bob")
+        self.depot = Group.objects.create(name="North")
+        self.alice.groups.add(self.depot)
+
+        self.day = datetime.date(2026, 10, 16)
+        OpsDailyJournal.objects.create(user=self.alice, entry_date=self.day, content="Late bus on route 12")
+        OpsDailyJournal.objects.create(user=self.bob, entry_date=self.day, content="Depot gate fixed")
+        OpsDailyJournal.objects.create(
+            user=self.bob, entry_date=self.day - datetime.timedelta(days=1), content="Yesterday's note"
+        )
+        self.client.force_login(self.manager)
+
+    def test_digest_lists_journals_for_the_date(self):
+        response = self.client.get(reverse("ops_journal_digest"), {"date": "2026-10-16"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Late bus on route 12")
+        self.assertContains(response, "Depot gate fixed")
+        self.assertNotContains(response, "Yesterday&#x27;s note")
+
+        response = self.client.get(reverse("ops_journal_digest"), {"date": "2026-10-16", "depot": self.depot.pk})
+        self.assertContains(response, "Late bus on route 12")
+        self.assertNotContains(response, "Depot gate fixed")
+
+    def test_autosave_refreshes_cached_digest(self):
+        today = timezone.localdate()
+        self.assertIn("No journals for", render_journal_digest(today))
+
+        self.client.force_login(self.alice)
+        self.client.post(reverse("ops_journal_autosave"), {"content": "Shift started"})
+
+        self.assertIn("Shift started", render_journal_digest(today))
+
+    def test_impossible_date_is_a_form_error(self):
+        response = self.client.get(reverse("ops_journal_digest"), {"date": "2026-02-30"})
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, "Please enter a valid date", status_code=400)
+
+        response = self.client.get(reverse("ops_journal_digest"), {"date": "2026-10-16", "depot": "abc"})
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, "Please choose a depot", status_code=400)
+
+    def test_command_emails_digest_for_the_date(self):
+        call_command("ops_send_journal_digest", "--date", "2026-10-16", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["manager@example.com"])
+        self.assertIn("16 Oct 2026", mail.outbox[0].subject)
+        self.assertIn("Late bus on route 12", mail.outbox[0].body)
+        self.assertNotIn("Yesterday's note", mail.outbox[0].body)
 
-# Create your tests here.
+    def test_command_rejects_impossible_date(self):
+        with self.assertRaises(CommandError):
+            call_command("ops_send_journal_digest", "--date", "2026-02-30", stdout=StringIO())
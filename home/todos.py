@@ -0,0 +1,49 @@
+# home/todos.py
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import OpsTodoItem
+
+# Counts are invalidated on every write, so the timeout is only a safety net
+TODO_COUNTS_TIMEOUT = 60 * 10
+
+
+def _todo_counts_key(user_id) -> str:
+    return f"ops:todo_counts:{user_id}"
+
+
+def get_todo_counts(user) -> dict:
+    """
+    Open to-do counts for the navbar badge:
+      - open: created by me OR assigned to me (same list as the Ops Hub)
+      - assigned_to_me: open items assigned to me
+    One aggregate query on a cache miss, none on a hit.
+    """
+    key = _todo_counts_key(user.pk)
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    counts = (
+        OpsTodoItem.objects
+        .filter(Q(user=user) | Q(assigned_to=user), is_done=False)
+        .aggregate(
+            open=Count("pk"),
+            assigned_to_me=Count("pk", filter=Q(assigned_to=user)),
+        )
+    )
+    cache.set(key, counts, TODO_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_todo_counts(*user_ids) -> None:
+    """
+    Drop cached counts for everyone touched by a to-do write (creator + assignee).
+    """
+    keys = [_todo_counts_key(uid) for uid in {uid for uid in user_ids if uid}]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
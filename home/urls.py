@@ -22,9 +22,12 @@ urlpatterns = [
     path("ops/hub/", views_ops.ops_hub, name="ops_hub"),
     path("ops/journal/autosave/", views_ops.ops_journal_autosave, name="ops_journal_autosave"),
     path("ops/journal/history/", views_ops.ops_journal_history, name="ops_journal_history"),
+    path("ops/journal/digest/", views_ops.ops_journal_digest, name="ops_journal_digest"),
     path("ops/todo/add/", views_ops.ops_todo_add, name="ops_todo_add"),
     path("ops/todo/<int:pk>/complete/", views_ops.ops_todo_complete, name="ops_todo_complete"),
+    path("ops/todo/bulk/", views_ops.ops_todo_bulk, name="ops_todo_bulk"),
     path("ops/todo/history/", views_ops.ops_todo_history, name="ops_todo_history"),
+    path("ops/todo/counts/", views_ops.ops_todo_counts, name="ops_todo_counts"),
     # home/urls.py
     path("ops/todo/<int:pk>/", views_ops.ops_todo_view, name="ops_todo_view"),
 
@@ -21,7 +21,10 @@ from .permissions import user_can_manage_ops
 
 from django.http import JsonResponse
 from .models import OpsDailyJournal
-from .models import OpsDailyJournal, OpsDailyJournalRevision, OpsTodoItem
+from .models import OpsDailyJournal, OpsDailyJournalRevision, OpsTodoItem, OpsTodoTemplate
+from .recurring import materialise_due_todos
+from .todos import get_todo_counts, invalidate_todo_counts
+from .journal_digest import invalidate_journal_digest, render_journal_digest
 
 
 # =========================================================
@@ -440,6 +443,7 @@ def ops_hub(request):
         "journal": journal,
         "todos": todos,
         "staff_users": staff_users,
+        "recurrence_choices": OpsTodoTemplate.RECURRENCE_CHOICES,
     })
 
 
@@ -481,6 +485,8 @@ def ops_journal_autosave(request):
             content_snapshot=content,
         )
 
+    invalidate_journal_digest(today)
+
     return JsonResponse({
         "ok": True,
         "updated_at": journal.updated_at.isoformat(),
@@ -518,6 +524,69 @@ def ops_journal_history(request):
     )
 
 
+@login_required
+def ops_journal_digest(request: HttpRequest) -> HttpResponse:
+    """
+    Manager digest: every controller's journal for one date (optionally one depot).
+    The rendered list is cached per date + depot and refreshed on autosave.
+    """
+    from django.contrib.auth.models import Group
+
+    if not user_can_manage_ops(request.user):
+        messages.error(request, "You do not have permission to view the journal digest.")
+        return redirect("home")
+
+    date_raw = (request.GET.get("date") or "").strip()
+    depot_id = (request.GET.get("depot") or "").strip()
+
+    entry_date = None
+    if date_raw:
+        try:
+            entry_date = parse_date(date_raw)
+        except ValueError:
+            # Well-formed but impossible, e.g. 2026-02-30
+            entry_date = None
+
+    depots = Group.objects.all().order_by("name")
+    depot = None
+    depot_error = None
+    if depot_id.isdigit():
+        depot = get_object_or_404(Group, pk=depot_id)
+    elif depot_id:
+        depot_error = "Please choose a depot from the list."
+    date_error = "Please enter a valid date (YYYY-MM-DD)." if date_raw and entry_date is None else None
+
+    if date_error or depot_error:
+        return render(
+            request,
+            "home/ops/manager_journal_digest.html",
+            {
+                "entry_date": entry_date,
+                "date_raw": date_raw,
+                "date_error": date_error,
+                "depot_error": depot_error,
+                "depots": depots,
+                "depot": depot,
+                "can_manage": True,
+            },
+            status=400,
+        )
+
+    entry_date = entry_date or timezone.localdate()
+
+    return render(
+        request,
+        "home/ops/manager_journal_digest.html",
+        {
+            "entry_date": entry_date,
+            "depots": depots,
+            "depot": depot,
+            "digest_html": render_journal_digest(entry_date, depot),
+            "can_manage": True,
+        },
+    )
+
+
 @login_required
 def ops_todo_history(request):
     todos = (
@@ -543,6 +612,7 @@ def ops_todo_add(request):
     title = (request.POST.get("title") or "").strip()
     description = (request.POST.get("description") or "").strip()
     assigned_to_id = (request.POST.get("assigned_to") or "").strip()
+    recurrence = (request.POST.get("recurrence") or "").strip()
 
     if not title:
         messages.error(request, "Please enter a to-do item.")
@@ -557,6 +627,28 @@ def ops_todo_add(request):
             messages.error(request, "You can only send to staff / superusers.")
             return redirect("ops_hub")
 
+    # Recurring: save a template (anchored on today) and let the scheduler
+    # create this period's item, so tomorrow's run won't duplicate it.
+    if recurrence:
+        if recurrence not in dict(OpsTodoTemplate.RECURRENCE_CHOICES):
+            messages.error(request, "Please choose a valid repeat option.")
+            return redirect("ops_hub")
+
+        today = timezone.localdate()
+        template = OpsTodoTemplate.objects.create(
+            created_by=request.user,
+            assigned_to=assigned_to,
+            title=title[:200].upper(),
+            description=description,
+            recurrence=recurrence,
+            weekday=today.weekday(),
+            day_of_month=today.day,
+        )
+        materialise_due_todos(on_date=today, templates=[template])
+
+        messages.success(request, f"Recurring to-do created ({template.get_recurrence_display()}).")
+        return redirect("ops_hub")
+
     OpsTodoItem.objects.create(
         user=request.user,
         sent_by=request.user,
@@ -564,6 +656,7 @@ def ops_todo_add(request):
         title=title[:200].upper(),
         description=description,
     )
+    invalidate_todo_counts(request.user.id, assigned_to.id)
 
     messages.success(request, "To-do created.")
     return redirect("ops_hub")
@@ -581,11 +674,105 @@ def ops_todo_complete(request, pk: int):
     todo.is_done = True
     todo.done_at = timezone.now()
     todo.save(update_fields=["is_done", "done_at", "updated_at"])
+    invalidate_todo_counts(todo.user_id, todo.assigned_to_id)
 
     messages.success(request, "To-do marked as DONE.")
     return redirect("ops_hub")
 
 
+@require_POST
+@login_required
+def ops_todo_bulk(request: HttpRequest) -> HttpResponse:
+    """
+    Shift handover: complete or reassign many to-dos at once.
+    One query to check permissions, then a single UPDATE ... WHERE id IN (...).
+    """
+    action = (request.POST.get("action") or "").strip()
+    raw_ids = request.POST.getlist("todo_ids")
+
+    try:
+        todo_ids = {int(i) for i in raw_ids if i}
+    except ValueError:
+        messages.error(request, "Invalid to-do selection.")
+        return redirect("ops_hub")
+
+    if not todo_ids:
+        messages.error(request, "Please select at least one to-do.")
+        return redirect("ops_hub")
+
+    if action not in ("complete", "reassign"):
+        messages.error(request, "Please choose a bulk action.")
+        return redirect("ops_hub")
+
+    new_assignee = None
+    if action == "reassign":
+        assigned_to_id = (request.POST.get("assigned_to") or "").strip()
+        if not assigned_to_id:
+            messages.error(request, "Please choose who to hand the to-dos over to.")
+            return redirect("ops_hub")
+        new_assignee = get_object_or_404(User, pk=assigned_to_id, is_active=True)
+        if not (new_assignee.is_staff or new_assignee.is_superuser):
+            messages.error(request, "You can only send to staff / superusers.")
+            return redirect("ops_hub")
+
+    # Permission check in one query: same rule as ops_todo_complete
+    allowed = list(
+        OpsTodoItem.objects
+        .filter(pk__in=todo_ids, is_done=False)
+        .filter(Q(user=request.user) | Q(assigned_to=request.user))
+        .values_list("pk", "user_id", "assigned_to_id")
+    )
+    allowed_ids = [pk for pk, _, _ in allowed]
+    skipped = len(todo_ids) - len(allowed_ids)
+
+    if not allowed_ids:
+        messages.error(request, "You do not have permission to update the selected to-dos.")
+        return redirect("ops_hub")
+
+    now = timezone.now()
+    # .update() skips auto_now, so set updated_at explicitly
+    if action == "complete":
+        updated = OpsTodoItem.objects.filter(pk__in=allowed_ids).update(
+            is_done=True,
+            done_at=now,
+            updated_at=now,
+        )
+        msg = f"{updated} to-do(s) marked as DONE."
+    else:
+        updated = OpsTodoItem.objects.filter(pk__in=allowed_ids).update(
+            assigned_to=new_assignee,
+            sent_by=request.user,
+            updated_at=now,
+        )
+        name = new_assignee.get_full_name() or new_assignee.username
+        msg = f"{updated} to-do(s) handed over to {name}."
+
+    affected_users = {uid for _, creator, assignee in allowed for uid in (creator, assignee)}
+    if new_assignee:
+        affected_users.add(new_assignee.pk)
+    invalidate_todo_counts(*affected_users)
+
+    if skipped:
+        msg += f" Skipped {skipped} (already done or not yours)."
+    messages.success(request, msg)
+    return redirect("ops_hub")
+
+
+@login_required
+def ops_todo_counts(request: HttpRequest) -> JsonResponse:
+    """
+    Tiny JSON endpoint for the navbar badge (polled from every page).
+    Served from a per-user cached counter; no hub/journal/staff queries.
+    """
+    counts = get_todo_counts(request.user)
+    response = JsonResponse({
+        "open": counts["open"],
+        "assigned_to_me": counts["assigned_to_me"],
+    })
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @login_required
 def ops_todo_view(request: HttpRequest, pk: int) -> HttpResponse:
     todo = get_object_or_404(OpsTodoItem, pk=pk, is_done=False)
@@ -0,0 +1,44 @@
+// Registers the academy service worker (offline lessons) and tells it what
+// to precache. Settings come from the #academy-offline element in base.html.
+(function () {
+  const config = document.getElementById("academy-offline");
+  if (!config || !("serviceWorker" in navigator)) return;
+
+  const { swUrl, scope, user, manifest } = config.dataset;
+
+  function csrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : null;
+  }
+
+  if (!user) {
+    // Logged out: remove any lessons and queued completions saved on this device
+    navigator.serviceWorker.getRegistration(scope).then(function (registration) {
+      if (registration && registration.active) {
+        registration.active.postMessage({ type: "clear" });
+      }
+    });
+    return;
+  }
+
+  function send(message) {
+    navigator.serviceWorker.ready.then(function (registration) {
+      message.csrf = csrfToken();
+      registration.active.postMessage(message);
+    });
+  }
+
+  navigator.serviceWorker.register(swUrl, { scope: scope }).then(function () {
+    if (manifest) {
+      send({ type: "precache", manifest: manifest, user: user });
+    } else {
+      send({ type: "sync" });
+    }
+  }).catch(function () {
+    // Offline support is optional; the academy works without it
+  });
+
+  window.addEventListener("online", function () {
+    send({ type: "sync" });
+  });
+})();